@@ -0,0 +1,71 @@
+"""
+Compare the latency of the Dash callbacks' API calls in the two API modes.
+
+    python benchmarks/api_modes.py --requests 200
+
+Each mode runs in a fresh interpreter with PEPTIDE_DIGEST_API_MODE set. The
+http mode needs the API running at PEPTIDE_DIGEST_API_URL, and the
+inprocess mode reads the database given by PEPTIDE_DIGEST_DB_PATH, so both
+should point at the same data.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+DASH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dash")
+
+PROBE = """
+import statistics, sys, time
+from utils import api_client
+
+requests = int(sys.argv[1])
+dois = [a["doi"] for a in api_client.get("/search/", {"term": "peptide", "page": 1}).json()]
+calls = {
+    "open article": lambda i: api_client.get(
+        "/retrieve/", {"doi": dois[i % len(dois)], "fields": "doi,title,url,authors,journal,date,keywords"}
+    ),
+    "summary tab": lambda i: api_client.get(
+        "/retrieve/", {"doi": dois[i % len(dois)], "fields": "bullet_points,summary"}
+    ),
+    "related": lambda i: api_client.get(f"/related/{dois[i % len(dois)]}"),
+    "search page": lambda i: api_client.get("/search/", {"term": "peptide", "page": 1}),
+}
+for name, call in calls.items():
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        assert call(i).status_code == 200
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"{name}\\t{statistics.median(latencies)}\\t{latencies[int(len(latencies) * 0.95)]}")
+"""
+
+
+def run(requests):
+    results = {}
+    for mode in ("http", "inprocess"):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, str(requests)],
+            cwd=DASH_DIR,
+            env={**os.environ, "PEPTIDE_DIGEST_API_MODE": mode},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for line in output.splitlines():
+            name, median, p95 = line.split("\t")
+            results.setdefault(name, {})[mode] = (float(median), float(p95))
+
+    for name, modes in results.items():
+        print(
+            f"{name:<13} http: median {modes['http'][0]:6.2f} ms  p95 {modes['http'][1]:6.2f} ms  "
+            f"inprocess: median {modes['inprocess'][0]:6.2f} ms  p95 {modes['inprocess'][1]:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    run(args.requests)
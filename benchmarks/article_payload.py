@@ -0,0 +1,75 @@
+"""
+Measure the bytes transferred when an article is opened in the Dash app.
+
+    python benchmarks/article_payload.py --term peptide --articles 50
+
+For each article found by the search, the article panel is built in process
+the way the modal callback builds it. Two sizes are reported: the API
+responses fetched by the Dash server, and the JSON component tree sent to
+the browser. The lazily loaded tabs are measured separately, since they are
+only paid for when the user opens them. The API must be running at the
+address given by PEPTIDE_DIGEST_API_URL, in the default http API mode.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+import plotly
+import requests
+
+DASH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dash")
+
+
+def component_size(component):
+    return len(json.dumps(component, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def run(term, articles):
+    sys.path.insert(0, DASH_DIR)
+    os.chdir(DASH_DIR)
+    import index  # noqa: F401, registers the callbacks
+    from utils import api_client, article_input
+    from utils.settings import API_URL
+
+    # Count the bytes of every API response read by the Dash code
+    fetched = [0]
+    get = requests.get
+
+    def counting_get(*args, **kwargs):
+        response = get(*args, **kwargs)
+        fetched[0] += len(response.content)
+        return response
+
+    api_client.requests.get = counting_get
+
+    dois = [
+        article["doi"]
+        for article in get(
+            f"{API_URL}/search/", params={"term": term, "page": 1, "page_size": articles}
+        ).json()
+    ]
+    if not dois:
+        sys.exit(f"No articles found for '{term}'")
+
+    def report(name, build):
+        fetched[0] = 0
+        sizes = [component_size(build(doi)) for doi in dois]
+        print(
+            f"{name:<16} API {fetched[0] / len(dois):8.0f} B  "
+            f"browser {statistics.mean(sizes):8.0f} B"
+        )
+
+    report("open article", article_input.get_article_info)
+    empty = [None] * len(article_input.LAZY_TABS)
+    for tab, (label, _, _) in article_input.LAZY_TABS.items():
+        report(label, lambda doi: article_input.load_article_tab(tab, doi, *empty))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--term", default="peptide")
+    parser.add_argument("--articles", type=int, default=50)
+    args = parser.parse_args()
+    run(args.term, args.articles)
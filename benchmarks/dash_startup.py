@@ -0,0 +1,55 @@
+"""
+Measure the cold start time of the Dash app.
+
+    python benchmarks/dash_startup.py --runs 10
+
+Each run imports dash/index.py in a fresh interpreter, which is what a
+gunicorn worker pays when the app is not preloaded, then renders every page.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DASH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dash")
+
+PROBE = """
+import time
+start = time.perf_counter()
+import index
+imported = time.perf_counter()
+for pathname in ["/", "/about", "/search", "/dbsearch"]:
+    index.display_page(pathname)
+rendered = time.perf_counter()
+print(imported - start, rendered - imported)
+"""
+
+
+def run(runs):
+    imports, renders = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=DASH_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        imports.append(float(output[-2]) * 1000)
+        renders.append(float(output[-1]) * 1000)
+    print(
+        f"import index: median {statistics.median(imports):7.1f} ms  "
+        f"min {min(imports):7.1f} ms"
+    )
+    print(
+        f"render pages: median {statistics.median(renders):7.1f} ms  "
+        f"min {min(renders):7.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    run(args.runs)
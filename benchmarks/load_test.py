@@ -0,0 +1,66 @@
+"""
+Minimal HTTP load generator for the API.
+
+    python benchmarks/load_test.py http://127.0.0.1:8000/search/?term=peptide \
+        --concurrency 16 --duration 20
+
+Prints the throughput and latency percentiles of successful requests.
+"""
+import argparse
+import threading
+import time
+
+import requests
+
+
+def run(url, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    if not latencies:
+        print(f"no successful requests, {errors[0]} errors")
+        return
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    print(
+        f"{len(latencies) / duration:8.1f} req/s  "
+        f"p50 {percentile(0.50):7.1f} ms  "
+        f"p95 {percentile(0.95):7.1f} ms  "
+        f"p99 {percentile(0.99):7.1f} ms  "
+        f"errors {errors[0]}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("url")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+    run(args.url, args.concurrency, args.duration)
@@ -2,18 +2,22 @@ import dash_bootstrap_components as dbc
 from dash import dcc
 
 from utils.colors import custom_colors
+from utils.content import load_markdown
 
-# Read the content of about.md
-with open("content/about.md", "r") as file:
-    about_content = file.read()
 
-# Create the layout for the about page
-layout = dbc.Container(
-    [
-        dcc.Markdown(
-            children=about_content,
-            style={"color": custom_colors["dark-blue"]},
-            dangerously_allow_html=True,  # Allow rendering HTML tags
-        )
-    ]
-)
+def layout():
+    """
+    This function builds the layout for the about page.
+
+    Returns:
+        dbc.Container: The about page.
+    """
+    return dbc.Container(
+        [
+            dcc.Markdown(
+                children=load_markdown("about.md"),
+                style={"color": custom_colors["dark-blue"]},
+                dangerously_allow_html=True,  # Allow rendering HTML tags
+            )
+        ]
+    )
@@ -1,15 +1,18 @@
-from dash import html, ctx, no_update
+from dash import dcc, html, no_update
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import dash_ag_grid as ag
 from dash.exceptions import PreventUpdate
-import requests
 
 from utils.colors import custom_colors
+from utils import api_client
 from utils.article_input import get_article_info
 from app import app
 
 
+# Width of the score bands returned by the facets endpoint
+SCORE_BAND_WIDTH = 2
+
 # Define sorting options
 sort_options = dbc.RadioItems(
     options=[
@@ -23,6 +26,37 @@ sort_options = dbc.RadioItems(
     style={"color": custom_colors["dark-blue"]},
 )
 
+# Facets shown next to the search results, as (id, title) pairs
+facet_names = [
+    ("journal", "Journal"),
+    ("publisher", "Publisher"),
+    ("year", "Year"),
+    ("score_band", "Score"),
+]
+
+# Panels with a checklist per facet, hidden until a search has been run
+facet_panels = html.Div(
+    [
+        dbc.Card(
+            [
+                dbc.CardHeader(title, style={"color": custom_colors["dark-blue"]}),
+                dbc.CardBody(
+                    dbc.Checklist(
+                        id=f"facet-{name}",
+                        options=[],
+                        value=[],
+                        style={"color": custom_colors["dark-blue"]},
+                    )
+                ),
+            ],
+            className="mb-2",
+        )
+        for name, title in facet_names
+    ],
+    id="facet-panels",
+    style={"display": "none"},
+)
+
 # Popup displaying article information
 article_popup = dbc.Modal(
     [
@@ -45,59 +79,144 @@ article_popup = dbc.Modal(
     scrollable=True,
 )
 
-# Layout for the database search page
-layout = dbc.Container(
-    [
-        html.H2("Database Search", style={"color": custom_colors["dark-blue"]}),
-        # Input field and search button
-        dbc.InputGroup(
-            [
-                dbc.Input(
-                    id="db-search-input",
-                    placeholder="Enter search term",
-                    type="text",
-                    style={"color": custom_colors["dark-blue"]},
-                ),
-                dbc.Button(
-                    "Search",
-                    id="db-search-btn",
-                    color="primary",
-                    n_clicks=0,
-                    style={"background-color": custom_colors["teal"]},
-                ),
-            ]
-        ),
-        sort_options,
-        # Display search results
-        html.Div(
-            [
-                html.Div(
-                    id="db-search-results",
-                    style={"color": custom_colors["dark-blue"]},
-                ),
-            ],
-            style={"margin-top": "20px"},  # Add margin top
-        ),
-        # Display article information modal when a row is selected
-        article_popup,
-    ]
+def layout():
+    """
+    This function builds the layout for the database search page.
+
+    Returns:
+    --------
+    dbc.Container: The database search page.
+    """
+    return dbc.Container(
+        [
+            html.H2("Database Search", style={"color": custom_colors["dark-blue"]}),
+            # Input field and search button
+            dbc.InputGroup(
+                [
+                    dbc.Input(
+                        id="db-search-input",
+                        placeholder="Enter search term",
+                        type="text",
+                        style={"color": custom_colors["dark-blue"]},
+                    ),
+                    dbc.Button(
+                        "Search",
+                        id="db-search-btn",
+                        color="primary",
+                        n_clicks=0,
+                        style={"background-color": custom_colors["teal"]},
+                    ),
+                ]
+            ),
+            sort_options,
+            dbc.Row(
+                [
+                    # Facet panels used to narrow down the search results
+                    dbc.Col(facet_panels, width=3),
+                    # Display search results
+                    dbc.Col(
+                        html.Div(
+                            id="db-search-results",
+                            style={"color": custom_colors["dark-blue"]},
+                        ),
+                        width=9,
+                    ),
+                ],
+                style={"margin-top": "20px"},  # Add margin top
+            ),
+            # Display article information modal when a row is selected
+            article_popup,
+            # DOI of a selected article that is not in the browser cache
+            dcc.Store(id="article-request"),
+        ]
+    )
+
+
+def facet_label(name, value):
+    """
+    This function returns the label shown for a facet value.
+
+    Parameters:
+    ----------
+    name (str): The name of the facet.
+    value (str or int): The facet value returned by the API.
+
+    Returns:
+    --------
+    str: The label for the facet value.
+    """
+    if name == "score_band":
+        return f"{value}-{value + SCORE_BAND_WIDTH}"
+    return str(value)
+
+
+@app.callback(
+    [Output(f"facet-{name}", "options") for name, _ in facet_names]
+    + [Output(f"facet-{name}", "value") for name, _ in facet_names]
+    + [Output("facet-panels", "style")],
+    [Input("db-search-btn", "n_clicks")],
+    [State("db-search-input", "value")]
+    + [State(f"facet-{name}", "value") for name, _ in facet_names],
 )
+def update_facets(n_clicks, search_term, *selected):
+    """
+    This function updates the facet panels with the counts for the search term.
+
+    Parameters:
+    ----------
+    n_clicks (int): The number of times the search button has been clicked.
+    search_term (str): The search term entered by the user.
+    selected (list): The currently selected values of each facet.
+
+    Returns:
+    --------
+    list: The options and selected values of each facet and the panel style.
+
+    Raises:
+    -------
+    PreventUpdate: If no input is provided.
+    """
+    if n_clicks is None or search_term is None:
+        raise PreventUpdate
+
+    response = api_client.get(
+        "/search/facets/", params={"term": search_term}
+    )
+    if response.status_code != 200:
+        raise PreventUpdate
+    counts = response.json()
+
+    options = [
+        [
+            {
+                "label": f"{facet_label(name, facet['value'])} ({facet['count']})",
+                "value": facet["value"],
+            }
+            for facet in counts.get(name, [])
+        ]
+        for name, _ in facet_names
+    ]
+    # Clear the previous selection, unless nothing was selected which would
+    # trigger a second search for the same results
+    values = [[] if value else no_update for value in selected]
+    return options + values + [{"display": "block"}]
 
 
 @app.callback(
     Output("db-search-results", "children"),
-    [Input("db-search-btn", "n_clicks")],
+    [Input("db-search-btn", "n_clicks")]
+    + [Input(f"facet-{name}", "value") for name, _ in facet_names],
     [State("db-search-input", "value"), State("sort-options", "value")],
 )
-def update_db_search_results(n_clicks, search_term, sort_order):
+def update_db_search_results(n_clicks, *args):
     """
-    This function updates the database search results based on the search term and sort order.
+    This function updates the database search results based on the search term, sort order and selected facets.
 
     Parameters:
     ----------
     n_clicks (int): The number of times the search button has been clicked.
-    search_term (str): The search term entered by the user.
-    sort_order (str): The sorting order selected by the user.
+    args (list): The selected values of each facet, followed by the search
+        term entered by the user and the sorting order selected by the user.
 
     Returns:
     --------
@@ -107,13 +226,16 @@ def update_db_search_results(n_clicks, search_term, sort_order):
     -------
     PreventUpdate: If no input is provided.
     """
+    *selected, search_term, sort_order = args
     if n_clicks is None or search_term is None:
         # Prevents the callback from being triggered without input
         raise PreventUpdate
 
-    response = requests.get(
-        f"http://127.0.0.1:8000/search/?term={search_term}&sort={sort_order}"
-    )
+    params = {"term": search_term, "sort": sort_order}
+    for (name, _), values in zip(facet_names, selected):
+        if values:
+            params[name] = values
+    response = api_client.get("/search/", params=params)
     if response.status_code == 200:
         articles = response.json()
         if articles:
@@ -163,6 +285,14 @@ def update_db_search_results(n_clicks, search_term, sort_order):
                 className="ag-theme-quartz",
             )
 
+            if response.headers.get("X-Result-Truncated"):
+                # The API stopped after its maximum number of results
+                note = html.P(
+                    f"Showing the first {len(articles)} results, refine the search "
+                    "term or the filters to see the others.",
+                    style={"color": custom_colors["dark-blue"]},
+                )
+                return html.Div([note, grid])
             return grid
 
         else:
@@ -171,6 +301,19 @@ def update_db_search_results(n_clicks, search_term, sort_order):
                 f"No articles found matching the search term: '{search_term}'.",
                 style={"color": custom_colors["dark-blue"]},
             )
+    elif response.status_code == 400:
+        # The search term was rejected, e.g. for being too short
+        return html.P(
+            response.json()["detail"],
+            style={"color": custom_colors["dark-blue"]},
+        )
+    elif response.status_code in (429, 503):
+        # The API is rate limiting this user or is overloaded
+        return html.P(
+            "Too many searches right now, please try again in "
+            f"{response.headers.get('Retry-After', '1')} seconds.",
+            style={"color": custom_colors["dark-blue"]},
+        )
     else:
         # If there's an error with the request, display a generic error message
         return html.P(
@@ -179,21 +322,33 @@ def update_db_search_results(n_clicks, search_term, sort_order):
         )
 
 
-@app.callback(
+# Open the modal from the article cache in the browser when the selected
+# article was opened recently, otherwise request it from the server
+app.clientside_callback(
+    ClientsideFunction(namespace="article_cache", function_name="open"),
     Output("article-selection-modal", "is_open"),
     Output("article-body-modal", "children"),
+    Output("article-request", "data"),
     Input("db-results-grid", "selectedRows"),
     Input("article-modal-close", "n_clicks"),
+    State("article-cache", "data"),
     prevent_initial_call=True,
 )
-def display_article_modal(selection, _):
+
+
+@app.callback(
+    Output("article-selection-modal", "is_open", allow_duplicate=True),
+    Output("article-body-modal", "children", allow_duplicate=True),
+    Input("article-request", "data"),
+    prevent_initial_call=True,
+)
+def display_article_modal(article_doi):
     """
-    This function displays the article information modal when a row is selected in the search results.
+    This function displays an article that is not in the browser cache in the modal.
 
     Parameters:
     ----------
-    selection (list): The selected row in the search results.
-    _ (int): The number of times the close button has been clicked.
+    article_doi (str): The DOI of the article selected in the search results.
 
     Returns:
     --------
@@ -202,19 +357,18 @@ def display_article_modal(selection, _):
 
     Raises:
     -------
-    PreventUpdate: If no input is provided.
+    PreventUpdate: If no article is requested.
     """
-    if not ctx.triggered or ctx.triggered_id == "article-modal-close":
-        return False, no_update
-
-    if not selection:
-        return no_update, no_update
-
-    article_doi = selection[0].get("doi")
     if not article_doi:
-        return no_update, no_update
+        raise PreventUpdate
+    return True, get_article_info(article_doi)
+
 
-    article_info = get_article_info(article_doi)
-    if article_info is None:
-        return False, no_update
-    return True, article_info
+# Keep the article shown in the modal in the browser cache
+app.clientside_callback(
+    ClientsideFunction(namespace="article_cache", function_name="storePanel"),
+    Output("article-cache", "data", allow_duplicate=True),
+    Input("article-body-modal", "children"),
+    State("article-cache", "data"),
+    prevent_initial_call=True,
+)
@@ -1,32 +1,105 @@
 from dash import html
+import requests
 import dash_bootstrap_components as dbc
 from dash import dcc
+from dash.dependencies import Input, Output
 
+from app import app
+from utils import api_client
 from utils.article_input import article_id_input
 from utils.colors import custom_colors
+from utils.content import load_markdown
 
 
-# Read the content of home.md
-with open("content/home.md", "r") as file:
-    home_content = file.read()
+# Number of recent matches shown per saved search
+ALERT_MATCHES = 5
 
 
-# Create the layout for the home page
-layout = dbc.Container(
-    [
-        html.H1(
-            "Peptide Digest",
-            style={"textAlign": "center", "color": custom_colors["dark-blue"]},
-        ),
-        dcc.Markdown(
-            children=home_content,
-            style={"color": custom_colors["dark-blue"]},
-        ),
-        html.Hr(),
-        article_id_input,  # The input section with the submit button
-        html.Div(
-            id="article-info",
-            style={"color": custom_colors["dark-blue"]},
-        ),
-    ],
+# Filled in once the page is shown, so rendering the home page does not wait
+# for the API
+@app.callback(
+    Output("saved-search-alerts", "children"),
+    [Input("saved-search-alerts", "id")],
 )
+def saved_search_alerts(_):
+    """
+    This function builds the list of the latest articles matched by each saved search.
+
+    Parameters:
+        _ (str): The id of the alerts Div, which triggers the callback when it is added to the page.
+
+    Returns:
+        list: A card per saved search, empty if there are none or the API is unavailable.
+    """
+    try:
+        response = api_client.get("/saved_searches/", params={"latest": ALERT_MATCHES})
+    except requests.RequestException:
+        # The home page still works while the API is down
+        return []
+    if response.status_code != 200 or not response.json():
+        return []
+
+    cards = [
+        dbc.Card(
+            [
+                dbc.CardHeader(
+                    f"{search['name']} ({search['count']} articles)",
+                    style={"color": custom_colors["dark-blue"]},
+                ),
+                dbc.CardBody(
+                    html.Ul(
+                        [
+                            html.Li(
+                                [
+                                    html.A(
+                                        article["title"],
+                                        href=f"https://doi.org/{article['doi']}",
+                                        target="_blank",
+                                    ),
+                                    f" ({article['date']}, score {article['score']})",
+                                ]
+                            )
+                            for article in search["latest"]
+                        ]
+                    )
+                    if search["latest"]
+                    else "No matching articles yet.",
+                    style={"color": custom_colors["dark-blue"]},
+                ),
+            ],
+            className="mb-2",
+        )
+        for search in response.json()
+    ]
+    return [
+        html.Hr(),
+        html.H3("Saved search alerts", style={"color": custom_colors["dark-blue"]}),
+    ] + cards
+
+
+def layout():
+    """
+    This function builds the layout for the home page.
+
+    Returns:
+        dbc.Container: The home page.
+    """
+    return dbc.Container(
+        [
+            html.H1(
+                "Peptide Digest",
+                style={"textAlign": "center", "color": custom_colors["dark-blue"]},
+            ),
+            dcc.Markdown(
+                children=load_markdown("home.md"),
+                style={"color": custom_colors["dark-blue"]},
+            ),
+            html.Hr(),
+            article_id_input,  # The input section with the submit button
+            html.Div(
+                id="article-info",
+                style={"color": custom_colors["dark-blue"]},
+            ),
+            html.Div(id="saved-search-alerts"),
+        ],
+    )
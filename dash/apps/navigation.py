@@ -37,6 +37,7 @@ layout = dbc.Navbar(
                                     dbc.NavItem(
                                         dbc.NavLink("DB Search", href="/dbsearch")
                                     ),
+                                    dbc.NavItem(dbc.NavLink("Trends", href="/trends")),
                                     dbc.NavItem(dbc.NavLink("About", href="/about")),
                                     dbc.NavItem(
                                         dbc.NavLink(
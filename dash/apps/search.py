@@ -4,11 +4,18 @@ import dash_bootstrap_components as dbc
 from utils.article_input import article_id_input
 from utils.colors import custom_colors
 
-# Create the layout for the search page
-layout = dbc.Container(
-    [
-        html.H2("Search for Articles", style={"color": custom_colors["dark-blue"]}),
-        article_id_input,
-        html.Div(id="article-info", style={"color": custom_colors["dark-blue"]}),
-    ]
-)
+
+def layout():
+    """
+    This function builds the layout for the search page.
+
+    Returns:
+        dbc.Container: The search page.
+    """
+    return dbc.Container(
+        [
+            html.H2("Search for Articles", style={"color": custom_colors["dark-blue"]}),
+            article_id_input,
+            html.Div(id="article-info", style={"color": custom_colors["dark-blue"]}),
+        ]
+    )
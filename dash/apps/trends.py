@@ -0,0 +1,84 @@
+from dash import dcc, html
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+import requests
+
+from utils import api_client
+from utils.colors import custom_colors
+
+# Number of journals and keywords charted
+TOP_VALUES = 15
+
+
+def bar_chart(title, values, horizontal=False):
+    """
+    This function builds a bar chart of article counts.
+
+    Parameters:
+    ----------
+    title (str): The title of the chart.
+    values (list): The {"value", "articles"} counts returned by /stats/.
+    horizontal (bool): Whether the bars are horizontal, for long labels.
+
+    Returns:
+    -------
+    dcc.Graph: The chart.
+    """
+    labels = [str(item["value"]) for item in values]
+    counts = [item["articles"] for item in values]
+    if horizontal:
+        # Largest count at the top
+        bar = go.Bar(x=counts[::-1], y=labels[::-1], orientation="h")
+    else:
+        bar = go.Bar(x=labels, y=counts)
+    bar.marker.color = custom_colors["teal"]
+    figure = go.Figure(bar)
+    figure.update_layout(
+        title=title,
+        font={"color": custom_colors["dark-blue"]},
+        margin={"l": 10, "r": 10, "t": 40, "b": 10},
+        plot_bgcolor="white",
+        height=400 if not horizontal else 30 * len(values) + 80,
+    )
+    figure.update_yaxes(automargin=True)
+    return dcc.Graph(figure=figure, config={"displayModeBar": False})
+
+
+def layout():
+    """
+    This function builds the layout for the trends page.
+
+    Returns:
+        dbc.Container: The trends page.
+    """
+    try:
+        response = api_client.get("/stats/", params={"top": TOP_VALUES})
+    except requests.RequestException:
+        # The page still renders while the API is down
+        response = None
+    if response is None or response.status_code != 200:
+        charts = html.P(
+            "The statistics are not available.", style={"color": custom_colors["dark-blue"]}
+        )
+    else:
+        stats = response.json()
+        charts = html.Div(
+            [
+                bar_chart("Articles per month", stats["month"]),
+                dbc.Row(
+                    [
+                        dbc.Col(bar_chart("Score distribution", stats["score"]), md=6),
+                        dbc.Col(
+                            bar_chart("Top journals", stats["journal"], horizontal=True), md=6
+                        ),
+                    ]
+                ),
+                bar_chart("Top keywords", stats["keyword"], horizontal=True),
+            ]
+        )
+    return dbc.Container(
+        [
+            html.H2("Trends", style={"color": custom_colors["dark-blue"]}),
+            charts,
+        ]
+    )
@@ -0,0 +1,106 @@
+// Browser-side cache of recently opened articles, kept in the session scoped
+// "article-cache" store as {order: [doi, ...], articles: {doi: {panel, tabs}}}.
+// Reopening a cached article in the Database Search modal makes no request to
+// the Dash server or the API.
+(function () {
+    // Number of articles kept, the least recently opened is dropped first
+    const MAX_ARTICLES = 20;
+    const LAZY_TABS = ["summary", "scoring", "metadata", "related"];
+
+    // Return the component with the given id in a component tree
+    function findComponent(node, id) {
+        if (Array.isArray(node)) {
+            for (const child of node) {
+                const found = findComponent(child, id);
+                if (found) {
+                    return found;
+                }
+            }
+            return null;
+        }
+        if (!node || !node.props) {
+            return null;
+        }
+        if (node.props.id === id) {
+            return node;
+        }
+        return findComponent(node.props.children, id);
+    }
+
+    // Return a copy of the cache, dcc.Store ignores data changed in place
+    function copyCache(cache) {
+        return cache && cache.order
+            ? JSON.parse(JSON.stringify(cache))
+            : {order: [], articles: {}};
+    }
+
+    function touch(cache, doi) {
+        cache.order = cache.order.filter((other) => other !== doi);
+        cache.order.push(doi);
+        while (cache.order.length > MAX_ARTICLES) {
+            delete cache.articles[cache.order.shift()];
+        }
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        article_cache: {
+            // Open the modal from the cache, or ask the server for the article
+            open: function (selection, closeClicks, cache) {
+                const noUpdate = window.dash_clientside.no_update;
+                const triggered = window.dash_clientside.callback_context.triggered;
+                if (triggered.length && triggered[0].prop_id.startsWith("article-modal-close")) {
+                    return [false, noUpdate, noUpdate];
+                }
+                const doi = selection && selection.length ? selection[0].doi : null;
+                if (!doi) {
+                    return [noUpdate, noUpdate, noUpdate];
+                }
+
+                const entry = cache && cache.articles ? cache.articles[doi] : null;
+                if (!entry) {
+                    return [noUpdate, noUpdate, doi];
+                }
+                const panel = JSON.parse(JSON.stringify(entry.panel));
+                for (const [name, content] of Object.entries(entry.tabs)) {
+                    const tab = findComponent(panel, "article-tab-" + name);
+                    if (tab) {
+                        tab.props.children = content;
+                    }
+                }
+                return [true, panel, noUpdate];
+            },
+
+            // Add the article shown in the modal to the cache, or mark it as
+            // the most recently opened one
+            storePanel: function (panel, cache) {
+                const store = findComponent(panel, "article-panel-doi");
+                if (!store) {
+                    return window.dash_clientside.no_update;
+                }
+                const doi = store.props.data;
+                cache = copyCache(cache);
+                if (!cache.articles[doi]) {
+                    cache.articles[doi] = {panel: panel, tabs: {}};
+                }
+                touch(cache, doi);
+                return cache;
+            },
+
+            // Add a lazily loaded tab of a cached article to the cache
+            storeTab: function (...args) {
+                const [doi, current] = args.slice(LAZY_TABS.length);
+                const triggered = window.dash_clientside.callback_context.triggered;
+                const name = triggered.length
+                    ? triggered[0].prop_id.split(".")[0].replace("article-tab-", "")
+                    : null;
+                const content = args[LAZY_TABS.indexOf(name)];
+                if (!current || !current.articles || !current.articles[doi] || !content) {
+                    return window.dash_clientside.no_update;
+                }
+                const cache = copyCache(current);
+                cache.articles[doi].tabs[name] = content;
+                return cache;
+            },
+        },
+    });
+})();
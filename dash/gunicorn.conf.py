@@ -0,0 +1,18 @@
+# Production profile for the Dash app: gunicorn serving the Flask server.
+#
+#   cd dash && gunicorn -c gunicorn.conf.py index:server
+#
+# Callbacks make blocking requests to the API, so each worker runs a few
+# threads to keep serving while it waits.
+from utils.settings import BIND, WORKERS
+
+bind = BIND
+workers = WORKERS
+worker_class = "gthread"
+threads = 4
+# Import the app once in the master so workers fork with it already loaded
+preload_app = True
+max_requests = 10000
+max_requests_jitter = 1000
+timeout = 60
+keepalive = 5
@@ -1,13 +1,17 @@
-from dash import dcc, html
+from dash import dcc
 from dash.dependencies import Input, Output
 import dash_bootstrap_components as dbc
+from flask import send_from_directory
 
-from app import app
-from apps import home, about, db_search, navigation, search
+from app import app, server
+from apps import home, about, db_search, navigation, search, trends
+from utils.settings import STATIC_PAGES_DIR, STATIC_PAGES_MAX_AGE
 
 url_content_layout = dbc.Container(
     [
         dcc.Location(id="url", refresh=False),
+        # Recently opened articles, see assets/article_cache.js
+        dcc.Store(id="article-cache", storage_type="session"),
         navigation.layout,
         dbc.Container(id="page-content", className="mt-4"),
     ]
@@ -15,16 +19,16 @@ url_content_layout = dbc.Container(
 
 app.layout = url_content_layout
 
-app.validation_layout = html.Div(
-    [
-        url_content_layout,
-        home.layout,
-        about.layout,
-        db_search.layout,
-        search.layout,
-        navigation.layout,
-    ]
-)
+# Page layouts are built when a page is visited rather than at import. There
+# is no validation_layout, since suppress_callback_exceptions makes Dash skip
+# validating callbacks against it.
+pages = {
+    "/": home.layout,
+    "/about": about.layout,
+    "/search": search.layout,
+    "/dbsearch": db_search.layout,
+    "/trends": trends.layout,
+}
 
 
 # Update the page content based on the URL
@@ -33,16 +37,15 @@ app.validation_layout = html.Div(
     [Input("url", "pathname")],
 )
 def display_page(pathname):
-    if pathname == "/":
-        return home.layout
-    elif pathname == "/about":
-        return about.layout
-    elif pathname == "/search":
-        return search.layout
-    elif pathname == "/dbsearch":
-        return db_search.layout
-    else:
-        return home.layout
+    return pages.get(pathname, home.layout)()
+
+
+# Serve the pre-rendered pages of the top articles straight from Flask,
+# without a callback round trip
+@server.route("/articles/", defaults={"filename": "index.html"})
+@server.route("/articles/<path:filename>")
+def static_article_page(filename):
+    return send_from_directory(STATIC_PAGES_DIR, filename, max_age=STATIC_PAGES_MAX_AGE)
 
 
 # Run the Dash app
@@ -0,0 +1,109 @@
+import inspect
+import sys
+from urllib.parse import unquote
+
+from flask import has_request_context, request
+import requests
+
+from utils.settings import API_MODE, API_URL, FASTAPI_DIR
+
+if API_MODE not in ("http", "inprocess"):
+    raise ValueError(f"Unknown PEPTIDE_DIGEST_API_MODE '{API_MODE}'")
+
+# FastAPI is only needed by the Dash app when it runs the API in process
+if API_MODE == "inprocess":
+    from fastapi import HTTPException, Response
+    from fastapi.params import Param
+    from starlette.routing import Match
+
+    # The API modules import each other as top-level modules
+    sys.path.insert(0, FASTAPI_DIR)
+    import peptide_digest_api
+
+    peptide_digest_api.prepare_database()
+
+
+class InProcessResponse:
+    """
+    The result of an endpoint called in process, with the parts of the
+    requests.Response interface used by the callbacks.
+    """
+
+    def __init__(self, status_code, data, headers=None):
+        self.status_code = status_code
+        self.data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+
+def call_endpoint(path, params):
+    """
+    This function calls the API endpoint matching a path without HTTP.
+
+    Query parameters are passed to the endpoint function as they are, so
+    they are neither serialized nor validated, and the result is returned
+    without being encoded to JSON.
+
+    Parameters:
+    ----------
+    path (str): The path of the endpoint, e.g. "/retrieve/", URL-quoted as in
+        an HTTP request.
+    params (dict): The query parameters, by their name in the query string.
+
+    Returns:
+    -------
+    InProcessResponse: The status code and result of the endpoint.
+    """
+    # The server matches routes on the decoded path
+    scope = {"type": "http", "path": unquote(path), "method": "GET"}
+    for route in peptide_digest_api.app.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            break
+    else:
+        return InProcessResponse(404, {"detail": "Not Found"})
+
+    kwargs = dict(child_scope.get("path_params", {}))
+    response = Response()
+    for name, parameter in inspect.signature(route.endpoint).parameters.items():
+        if name in kwargs:
+            continue
+        if parameter.annotation is Response:
+            # Endpoints set extra headers on the response they are given
+            kwargs[name] = response
+            continue
+        default = parameter.default
+        if isinstance(default, Param):
+            # Query(...) defaults carry the alias and the real default
+            key, default = default.alias or name, default.default
+        else:
+            key = name
+        kwargs[name] = params.get(key, default)
+
+    try:
+        return InProcessResponse(200, route.endpoint(**kwargs), response.headers)
+    except HTTPException as e:
+        return InProcessResponse(e.status_code, {"detail": e.detail}, e.headers)
+
+
+def get(path, params=None):
+    """
+    This function sends a GET request to the API.
+
+    Parameters:
+    ----------
+    path (str): The path of the endpoint, e.g. "/retrieve/".
+    params (dict): The query parameters.
+
+    Returns:
+    -------
+    requests.Response or InProcessResponse: The response of the API.
+    """
+    if API_MODE == "inprocess":
+        return call_endpoint(path, params or {})
+    # Pass on the address of the user, so the API rate limits each user
+    # rather than the Dash server as a whole
+    headers = {"X-Forwarded-For": request.remote_addr} if has_request_context() else None
+    return requests.get(f"{API_URL}{path}", params=params, headers=headers)
@@ -1,16 +1,20 @@
-import dash
+from urllib.parse import quote
+
 import dash_bootstrap_components as dbc
 from dash import dcc
+from dash import no_update
 from dash import html
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
 from dash.exceptions import PreventUpdate
-import requests
 
 from app import app
+from utils import api_client
 from utils.colors import custom_colors
+from utils.settings import FEEDBACK_PATH
 
 # Create a dropdown menu for the article type
 articletype_menu = [
+    dbc.DropdownMenuItem("Auto", id="auto-dropdown"),
     dbc.DropdownMenuItem("DOI", id="doi-dropdown"),
     dbc.DropdownMenuItem("URL", id="url-dropdown"),
     dbc.DropdownMenuItem("PII", id="pii-dropdown"),
@@ -22,14 +26,14 @@ article_id_input = dbc.InputGroup(
     [
         dbc.DropdownMenu(
             articletype_menu,
-            label="Select Type",
+            label="Auto",
             id="articletype-dropdown",
             color=custom_colors["teal"],
         ),
         dbc.Input(
             id="user-input-article-type",
             type="text",
-            placeholder="Enter article DOI/URL/PII",
+            placeholder="Enter article DOI, URL, PII or PMC ID",
             style={"color": custom_colors["dark-blue"]},
         ),
         dbc.Button(
@@ -44,77 +48,217 @@ article_id_input = dbc.InputGroup(
 )
 
 
-# Define callback to update the article type label
-@app.callback(
+# Update the article type label and the input placeholder in the browser, so
+# picking a type does not need a request to the server. "Auto" lets the API
+# work out the identifier type from the pasted text.
+app.clientside_callback(
+    """
+    function(n0, n1, n2, n3) {
+        const triggered = window.dash_clientside.callback_context.triggered;
+        const buttonId = triggered.length ? triggered[0].prop_id.split(".")[0] : "";
+        const labels = {"doi-dropdown": "DOI", "url-dropdown": "URL", "pii-dropdown": "PII"};
+        const label = labels[buttonId] || "Auto";  // Default value
+        const placeholder = label === "Auto" ? "DOI, URL, PII or PMC ID" : label;
+        return [label, "Enter article " + placeholder];
+    }
+    """,
     Output("articletype-dropdown", "label"),
+    Output("user-input-article-type", "placeholder"),
     [
+        Input("auto-dropdown", "n_clicks"),
         Input("doi-dropdown", "n_clicks"),
         Input("url-dropdown", "n_clicks"),
         Input("pii-dropdown", "n_clicks"),
     ],
 )
-def update_label(n1, n2, n3):
+
+
+def related_articles(doi):
     """
-    This function returns the label for the article type dropdown menu.
+    This function lists the articles related to an article.
 
     Parameters:
-        n1 (int): The number of clicks for the DOI dropdown menu.
-        n2 (int): The number of clicks for the URL dropdown menu.
-        n3 (int): The number of clicks for the PII dropdown menu.
+    ----------
+    doi (str): The DOI of the article.
 
     Returns:
-        str: The label for the article type dropdown menu.
+    -------
+    html.Component: Links to the related articles.
     """
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        button_id = "doi-dropdown"  # default value
-    else:
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-
-    if button_id == "doi-dropdown":
-        return "DOI"
-    elif button_id == "url-dropdown":
-        return "URL"
-    elif button_id == "pii-dropdown":
-        return "PII"
-    else:
-        return "DOI"  # Default value
+    # DOIs can contain characters such as "#" or "?" that end a URL path
+    response = api_client.get(f"/related/{quote(doi)}")
+    related = response.json() if response.status_code == 200 else []
+
+    if not related:
+        return html.P("No related articles found.")
+    return html.Ul(
+        [
+            html.Li(
+                [
+                    html.A(
+                        article["title"],
+                        href=f"https://doi.org/{article['doi']}",
+                        target="_blank",  # Open link in a new tab
+                        style={"color": custom_colors["dark-blue"]},
+                    ),
+                    f" ({article['date']})",
+                ]
+            )
+            for article in related
+        ]
+    )
+
+
+# Fields fetched when an article is opened. The long text fields of the
+# Summary, Scoring Criteria and Metadata tabs and the related articles are
+# fetched when the tab is first selected.
+HEADER_FIELDS = "doi,title,url,authors,journal,date,keywords"
+
+# Label, fields and Markdown template of the tabs that are loaded lazily. The
+# Related tab is read from /related/ rather than /retrieve/.
+LAZY_TABS = {
+    "summary": (
+        "Summary",
+        "bullet_points,summary",
+        "**Bullet Points:**\n{bullet_points}\n\n**Summary:**\n{summary}",
+    ),
+    "scoring": (
+        "Scoring Criteria",
+        "score,score_justification",
+        "**Score:**\n{score}\n\n**Scoring Reasoning:**\n{score_justification}",
+    ),
+    "metadata": ("Metadata", "metadata", "**Metadata:**\n\n{metadata}"),
+    "related": ("Related", None, None),
+}
+
+
+def article_panel(article_info):
+    """
+    This function builds the panel showing an article.
+
+    Parameters:
+    ----------
+    article_info (dict): The header fields of the article.
+
+    Returns:
+    -------
+    html.Div: The article header and its tabs.
+    """
+    detailed_info = html.Div(
+        [
+            html.H5("Article Information:", style={"color": custom_colors["dark-blue"]}),
+            html.P(f"DOI: {article_info['doi']}", id="displayed-doi", style={"color": custom_colors["dark-blue"]}),
+
+            html.P(
+                html.A(
+                    article_info["title"],
+                    href=article_info["url"],
+                    target="_blank",  # Open link in a new tab
+                    style={"color": custom_colors["dark-blue"]},
+                )
+            ),
+        ],
+        className="article-detailed-info",
+    )
+
+    feedback_tab = dbc.Tab(
+        [
+            dbc.Input(id="name-input", placeholder="Enter your name", type="text"),
+            dbc.Input(id="doi-input", value="", placeholder="Enter the article DOI", type="text"),
+            dbc.Textarea(id="feedback-input", placeholder="Enter your feedback", rows=3),
+            dbc.Button("Submit Feedback", id="submit-feedback-btn", color="success", className="mt-2"),
+            html.Div(id="feedback-message")
+        ],
+        label="Submit Feedback"
+    )
+
+    # Tabbed interface, the lazy tabs are filled in by load_article_tab
+    tabbed_interface = dbc.Tabs(
+        [
+            dbc.Tab(
+                dcc.Markdown(
+                    f"**Authors:**\n{article_info['authors']}\n\n"
+                    f"**Journal:**\n{article_info['journal']}\n\n"
+                    f"**Date:**\n{article_info['date']}\n\n"
+                    f"**Keywords:**\n{article_info['keywords']}"
+                ),
+                label="Article Info",
+                tab_id="info",
+            ),
+            *[
+                dbc.Tab(html.Div(id=f"article-tab-{name}"), label=label, tab_id=name)
+                for name, (label, _, _) in LAZY_TABS.items()
+            ],
+            feedback_tab
+        ],
+        id="article-tabs",
+        active_tab="info",
+        className="article-tabs",
+    )
+
+    # Combine detailed info and tabs in a single Div to avoid list of lists
+    return html.Div(
+        [
+            dcc.Store(id="article-panel-doi", data=article_info["doi"]),
+            detailed_info,
+            tabbed_interface,
+        ]
+    )
 
 
 @app.callback(
-    Output("user-input-article-type", "placeholder"),
-    [
-        Input("doi-dropdown", "n_clicks"),
-        Input("url-dropdown", "n_clicks"),
-        Input("pii-dropdown", "n_clicks"),
-    ],
+    [Output(f"article-tab-{name}", "children") for name in LAZY_TABS],
+    [Input("article-tabs", "active_tab")],
+    [State("article-panel-doi", "data")]
+    + [State(f"article-tab-{name}", "children") for name in LAZY_TABS],
 )
-def update_placeholder(n1, n2, n3):
+def load_article_tab(active_tab, doi, *loaded):
     """
-    This function returns the placeholder for the article type input field.
+    This function fetches the content of a lazy tab the first time it is selected.
 
     Parameters:
-        n1 (int): The number of clicks for the DOI dropdown menu.
-        n2 (int): The number of clicks for the URL dropdown menu.
-        n3 (int): The number of clicks for the PII dropdown menu.
+    ----------
+    active_tab (str): The id of the selected tab.
+    doi (str): The DOI of the displayed article.
+    loaded (tuple): The current content of every lazy tab.
 
     Returns:
-        str: The placeholder for the article type input field.
+    -------
+    list: The content of the selected tab, and no_update for the others.
+
+    Raises:
+    -------
+    PreventUpdate: If the selected tab is not lazy or is already loaded.
     """
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        button_id = "doi-dropdown"  # default value
-    else:
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-
-    if button_id == "doi-dropdown":
-        return "Enter article DOI"
-    elif button_id == "url-dropdown":
-        return "Enter article URL"
-    elif button_id == "pii-dropdown":
-        return "Enter article PII"
+    if active_tab not in LAZY_TABS or not doi:
+        raise PreventUpdate
+    names = list(LAZY_TABS)
+    if loaded[names.index(active_tab)]:
+        raise PreventUpdate
+
+    _, fields, template = LAZY_TABS[active_tab]
+    if active_tab == "related":
+        content = related_articles(doi)
     else:
-        return "Enter article DOI"
+        response = api_client.get(
+            "/retrieve/", params={"doi": doi, "fields": fields}
+        )
+        if response.status_code == 200:
+            content = dcc.Markdown(template.format(**response.json()))
+        else:
+            content = html.P("Error in fetching information.")
+    return [content if name == active_tab else no_update for name in names]
+
+
+# Keep lazily loaded tabs of articles in the browser cache, so they are not
+# fetched again when a cached article is reopened
+app.clientside_callback(
+    ClientsideFunction(namespace="article_cache", function_name="storeTab"),
+    Output("article-cache", "data", allow_duplicate=True),
+    [Input(f"article-tab-{name}", "children") for name in LAZY_TABS],
+    [State("article-panel-doi", "data"), State("article-cache", "data")],
+    prevent_initial_call=True,
+)
 
 
 @app.callback(
@@ -130,7 +274,7 @@ def update_article_info(n_clicks, input_value, article_type):
     ----------
     n_clicks (int): The number of times the submit button has been clicked.
     input_value (str): The article identifier entered by the user.
-    article_type (str): The type of article identifier (DOI, URL, or PII).
+    article_type (str): The type of article identifier (Auto, DOI, URL, or PII).
 
     Returns:
     -------
@@ -140,86 +284,23 @@ def update_article_info(n_clicks, input_value, article_type):
     -------
     PreventUpdate: If no input is provided.
     """
-    if n_clicks is None or n_clicks < 1:
+    if n_clicks is None or n_clicks < 1 or not input_value:
         raise PreventUpdate
 
-    query_param = (
-        "doi" if article_type == "DOI" else "url" if article_type == "URL" else "pii"
-    )
-    response = requests.get(
-        f"http://127.0.0.1:8000/retrieve/?{query_param}={input_value}"
-    )
-
-    if response.status_code == 200:
-        article_info = response.json()
-
-        detailed_info = html.Div(
-            [
-                html.H5("Article Information:", style={"color": custom_colors["dark-blue"]}),
-                html.P(f"DOI: {article_info['doi']}", id="displayed-doi", style={"color": custom_colors["dark-blue"]}),
-
-                html.P(
-                    html.A(
-                        article_info["title"],
-                        href=article_info["url"],
-                        target="_blank",  # Open link in a new tab
-                        style={"color": custom_colors["dark-blue"]},
-                    )
-                ),
-            ],
-            className="article-detailed-info",
-        )
-
-
-        feedback_tab = dbc.Tab(
-            [
-                dbc.Input(id="name-input", placeholder="Enter your name", type="text"),
-                dbc.Input(id="doi-input", value="", placeholder="Enter the article DOI", type="text"),
-                dbc.Textarea(id="feedback-input", placeholder="Enter your feedback", rows=3),
-                dbc.Button("Submit Feedback", id="submit-feedback-btn", color="success", className="mt-2"),
-                html.Div(id="feedback-message")
-            ],
-            label="Submit Feedback"
+    query_params = {"DOI": "doi", "URL": "url", "PII": "pii"}
+    if article_type in query_params:
+        response = api_client.get(
+            "/retrieve/",
+            params={query_params[article_type]: input_value, "fields": HEADER_FIELDS},
         )
-
-        # Tabbed interface
-        tabbed_interface = dbc.Tabs(
-            [
-                dbc.Tab(
-                    dcc.Markdown(
-                        f"**Authors:**\n{article_info['authors']}\n\n"
-                        f"**Journal:**\n{article_info['journal']}\n\n"
-                        f"**Date:**\n{article_info['date']}\n\n"
-                        f"**Keywords:**\n{article_info['keywords']}"
-                    ),
-                    label="Article Info",
-                ),
-                dbc.Tab(
-                    dcc.Markdown(
-                        f"**Bullet Points:**\n{article_info['bullet_points']}\n\n"
-                        f"**Summary:**\n{article_info['summary']}"
-                    ),
-                    label="Summary",
-                ),
-                dbc.Tab(
-                    dcc.Markdown(
-                        f"**Score:**\n{article_info['score']}\n\n"
-                        f"**Scoring Reasoning:**\n{article_info['score_justification']}"
-                    ),
-                    label="Scoring Criteria",
-                ),
-                dbc.Tab(
-                    dcc.Markdown(f"**Metadata:**\n{article_info['metadata']}"),
-                    label="Metadata",
-                ),
-
-                feedback_tab
-            ],
-            className="article-tabs",
+    else:
+        # Let the API detect whether the input is a DOI, URL, PII or PMC ID
+        response = api_client.get(
+            "/resolve/", params={"q": input_value, "fields": HEADER_FIELDS}
         )
 
-        # Combine detailed info and tabs in a single Div to avoid list of lists
-        return html.Div([detailed_info, tabbed_interface])
+    if response.status_code == 200:
+        return article_panel(response.json())
     else:
         return html.P(
             "Article not found or error in fetching information.",
@@ -239,75 +320,12 @@ def get_article_info(input_doi):
     -------
     html.Div: A Div containing the detailed information about the article.
     """
-    response = requests.get(f"http://127.0.0.1:8000/retrieve/?doi={input_doi}")
+    response = api_client.get(
+        "/retrieve/", params={"doi": input_doi, "fields": HEADER_FIELDS}
+    )
 
     if response.status_code == 200:
-        article_info = response.json()
-
-        detailed_info = html.Div(
-            [
-                html.H5("Article Information:", style={"color": custom_colors["dark-blue"]}),
-                html.H5(f"DOI: {article_info['doi']}", id="displayed-doi", style={"color": custom_colors["dark-blue"]}),
-
-                html.P(
-                    html.A(
-                        article_info["title"],
-                        href=article_info["url"],
-                        target="_blank",  # Open link in a new tab
-                        style={"color": custom_colors["dark-blue"]},
-                    )
-                ),
-            ],
-            className="article-detailed-info",
-        )
-
-        feedback_tab = dbc.Tab(
-            [
-                dbc.Input(id="name-input", placeholder="Enter your name", type="text"),
-                dbc.Input(id="doi-input", value="", placeholder="Enter the article DOI", type="text"),
-                dbc.Textarea(id="feedback-input", placeholder="Enter your feedback", rows=3),
-                dbc.Button("Submit Feedback", id="submit-feedback-btn", color="success", className="mt-2"),
-                html.Div(id="feedback-message")
-            ],
-            label="Submit Feedback"
-        )
-        # Tabbed interface
-        tabbed_interface = dbc.Tabs(
-            [
-                dbc.Tab(
-                    dcc.Markdown(
-                        f"**Authors:**\n{article_info['authors']}\n\n"
-                        f"**Journal:**\n{article_info['journal']}\n\n"
-                        f"**Date:**\n{article_info['date']}\n\n"
-                        f"**Keywords:**\n{article_info['keywords']}"
-                    ),
-                    label="Article Info",
-                ),
-                dbc.Tab(
-                    dcc.Markdown(
-                        f"**Bullet Points:**\n{article_info['bullet_points']}\n\n"
-                        f"**Summary:**\n{article_info['summary']}"
-                    ),
-                    label="Summary",
-                ),
-                dbc.Tab(
-                    dcc.Markdown(
-                        f"**Score:**\n{article_info['score']}\n\n"
-                        f"**Scoring Reasoning:**\n{article_info['score_justification']}"
-                    ),
-                    label="Scoring Criteria",
-                ),
-                dbc.Tab(
-                    dcc.Markdown(f"**Metadata:**\n\n{article_info['metadata']}"),
-                    label="Metadata",
-                ),
-                feedback_tab
-            ],
-            className="article-tabs",
-        )
-
-        # Combine detailed info and tabs in a single Div to avoid list of lists
-        return html.Div([detailed_info, tabbed_interface])
+        return article_panel(response.json())
     else:
         return html.P(
             "Article not found or error in fetching information.",
@@ -326,7 +344,7 @@ def submit_feedback(n_clicks, name, doi, feedback):
 
     if name and doi and feedback:
         try:
-            with open("/usr/src/app/data/feedback.csv", "a") as f:
+            with open(FEEDBACK_PATH, "a") as f:
                 f.write(f"{name},{feedback},{doi}\n")
                 f.flush()  # Flush the file buffer
                 print("Feedback data written to file")  # Print a message to indicate success
@@ -337,13 +355,16 @@ def submit_feedback(n_clicks, name, doi, feedback):
     else:
         return "Please enter your name, the article DOI, and feedback."
         
-@app.callback(
+# Prefill the feedback DOI from the displayed DOI in the browser
+app.clientside_callback(
+    """
+    function(displayed_doi) {
+        if (displayed_doi) {
+            return displayed_doi.split(": ")[1];
+        }
+        return "";
+    }
+    """,
     Output("doi-input", "value"),
-    [Input("displayed-doi", "children")]
+    [Input("displayed-doi", "children")],
 )
-def update_doi_input(displayed_doi):
-    if displayed_doi:
-        doi = displayed_doi.split(': ')[1]
-        return doi
-    else:
-        return ""
\ No newline at end of file
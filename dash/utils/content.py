@@ -0,0 +1,28 @@
+import functools
+import os
+
+# Markdown files shown on the pages, independent of the working directory
+CONTENT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def load_markdown(name):
+    """
+    This function returns the content of a markdown file in the content directory.
+
+    The file is read the first time a page needs it and cached afterwards.
+
+    Parameters:
+        name (str): The name of the markdown file, e.g. "home.md".
+
+    Returns:
+        str: The markdown content, or an empty string if the file is missing.
+    """
+    try:
+        with open(os.path.join(CONTENT_DIR, name), "r") as file:
+            return file.read()
+    except OSError as e:
+        print(f"Error reading content file {name}: {str(e)}")
+        return ""
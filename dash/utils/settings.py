@@ -0,0 +1,31 @@
+import os
+
+# Settings of the Dash app, overridable with PEPTIDE_DIGEST_* environment variables
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Base URL of the FastAPI service
+API_URL = os.environ.get("PEPTIDE_DIGEST_API_URL", "http://127.0.0.1:8000").rstrip("/")
+
+# How the callbacks reach the API: "http" calls the service at API_URL, and
+# "inprocess" imports the API from FASTAPI_DIR and calls its endpoints
+# directly, for single-host deployments
+API_MODE = os.environ.get("PEPTIDE_DIGEST_API_MODE", "http")
+FASTAPI_DIR = os.path.join(BASE_DIR, "fastapi")
+
+# CSV file the article feedback is appended to
+FEEDBACK_PATH = os.environ.get(
+    "PEPTIDE_DIGEST_FEEDBACK_PATH", os.path.join(BASE_DIR, "data", "feedback.csv")
+)
+
+# Pre-rendered article pages built by utils/static_pages.py, and how long
+# browsers and CDNs may cache them (seconds)
+STATIC_PAGES_DIR = os.environ.get(
+    "PEPTIDE_DIGEST_STATIC_PAGES_DIR", os.path.join(BASE_DIR, "data", "static_pages")
+)
+STATIC_PAGES_MAX_AGE = int(os.environ.get("PEPTIDE_DIGEST_STATIC_PAGES_MAX_AGE", 86400))
+
+# Address and number of worker processes used by gunicorn.conf.py
+BIND = os.environ.get("PEPTIDE_DIGEST_DASH_BIND", "127.0.0.1:8050")
+WORKERS = int(
+    os.environ.get("PEPTIDE_DIGEST_DASH_WORKERS", 2 * (os.cpu_count() or 1) + 1)
+)
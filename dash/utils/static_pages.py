@@ -0,0 +1,213 @@
+"""
+Pre-render static HTML and JSON pages for the most viewed articles.
+
+    cd dash && python -m utils.static_pages --count 200
+
+The pages cover the top articles by score and the most recent articles, and
+are written to STATIC_PAGES_DIR, from where index.py serves them under
+/articles/ with long cache headers (or a CDN can serve the directory).
+A manifest records a hash of each page's data, so a rebuild only rewrites
+the pages of articles that changed and removes the ones that dropped out.
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+
+from utils import api_client
+from utils.colors import custom_colors
+from utils.settings import STATIC_PAGES_DIR
+
+MANIFEST_FILE = "manifest.json"
+
+# Part of every page hash, bump it when the page template changes so the
+# next build rewrites every page
+TEMPLATE_VERSION = 1
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title} | Peptide Digest</title>
+<meta name="description" content="{description}">
+<link rel="canonical" href="https://doi.org/{doi}">
+<style>
+body {{ font-family: sans-serif; max-width: 60em; margin: 2em auto; padding: 0 1em; color: {text_color}; }}
+a {{ color: {link_color}; }}
+.field {{ white-space: pre-wrap; }}
+</style>
+</head>
+<body>
+<p><a href="/">Peptide Digest</a> &rsaquo; <a href="/articles/">Top articles</a></p>
+<h1>{title}</h1>
+<p>DOI: <a href="https://doi.org/{doi}">{doi}</a></p>
+<p>{authors}<br>{journal}, {date}</p>
+<p><strong>Score:</strong> {score}</p>
+<h2>Summary</h2>
+<div class="field">{bullet_points}</div>
+<div class="field">{summary}</div>
+<h2>Scoring Reasoning</h2>
+<div class="field">{score_justification}</div>
+<h2>Keywords</h2>
+<p>{keywords}</p>
+<h2>Metadata</h2>
+<div class="field">{metadata}</div>
+</body>
+</html>
+"""
+
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Top articles | Peptide Digest</title>
+<style>body {{ font-family: sans-serif; max-width: 60em; margin: 2em auto; color: {text_color}; }}
+a {{ color: {link_color}; }}</style>
+</head>
+<body>
+<h1>Top articles</h1>
+<ul>
+{items}
+</ul>
+</body>
+</html>
+"""
+
+
+def page_name(doi):
+    """
+    This function returns the file name of the page of an article.
+
+    Parameters:
+    ----------
+    doi (str): The DOI of the article.
+
+    Returns:
+    -------
+    str: The DOI with every character unsafe in a URL or file name replaced.
+    """
+    return re.sub(r"[^a-z0-9._-]", "_", doi.lower())
+
+
+def render_page(article):
+    """
+    This function renders the static HTML page of an article.
+
+    Parameters:
+    ----------
+    article (dict): The article, as returned by /retrieve/.
+
+    Returns:
+    -------
+    str: The HTML page.
+    """
+    fields = {
+        name: html.escape(str(article.get(name) or ""))
+        for name in [
+            "title", "doi", "authors", "journal", "date", "score", "bullet_points",
+            "summary", "score_justification", "keywords", "metadata",
+        ]
+    }
+    return PAGE_TEMPLATE.format(
+        description=html.escape((article.get("summary") or "")[:200]),
+        text_color=custom_colors["dark-blue"],
+        link_color=custom_colors["teal"],
+        **fields,
+    )
+
+
+def write_file(path, content):
+    """
+    This function writes a file atomically, so the server never serves a partial page.
+    """
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(path + ".tmp", path)
+
+
+def build_static_pages(output_dir=STATIC_PAGES_DIR, count=200):
+    """
+    This function renders the pages of the top articles, rewriting only the changed ones.
+
+    Parameters:
+    ----------
+    output_dir (str): The directory the pages are written to.
+    count (int): The number of top articles by score, and of most recent
+        articles, to render.
+
+    Returns:
+    -------
+    dict: The number of pages written, unchanged and removed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    top = []
+    for by in ("score", "date"):
+        response = api_client.get("/top/", params={"n": count, "by": by})
+        if response.status_code != 200:
+            raise RuntimeError(f"/top/ returned status {response.status_code}")
+        top.extend(response.json())
+    dois = list(dict.fromkeys(article["doi"] for article in top))
+
+    stats = {"written": 0, "unchanged": 0, "removed": 0}
+    new_manifest = {}
+    for doi in dois:
+        response = api_client.get("/retrieve/", params={"doi": doi})
+        if response.status_code != 200:
+            continue
+        article = response.json()
+        data = json.dumps(article, sort_keys=True)
+        digest = hashlib.sha256(f"{TEMPLATE_VERSION}:{data}".encode()).hexdigest()
+        name = page_name(doi)
+        new_manifest[doi] = {"page": name, "hash": digest, "title": article["title"]}
+
+        if manifest.get(doi, {}).get("hash") == digest:
+            stats["unchanged"] += 1
+            continue
+        write_file(os.path.join(output_dir, name + ".json"), data)
+        write_file(os.path.join(output_dir, name + ".html"), render_page(article))
+        stats["written"] += 1
+
+    for doi, entry in manifest.items():
+        if doi not in new_manifest:
+            for extension in (".html", ".json"):
+                path = os.path.join(output_dir, entry["page"] + extension)
+                if os.path.exists(path):
+                    os.remove(path)
+            stats["removed"] += 1
+
+    if new_manifest != manifest:
+        items = "\n".join(
+            f'<li><a href="/articles/{entry["page"]}.html">{html.escape(entry["title"] or doi)}</a></li>'
+            for doi, entry in new_manifest.items()
+        )
+        write_file(
+            os.path.join(output_dir, "index.html"),
+            INDEX_TEMPLATE.format(
+                items=items,
+                text_color=custom_colors["dark-blue"],
+                link_color=custom_colors["teal"],
+            ),
+        )
+        write_file(manifest_path, json.dumps(new_manifest, indent=1, sort_keys=True))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output-dir", default=STATIC_PAGES_DIR)
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args()
+    stats = build_static_pages(args.output_dir, args.count)
+    print(
+        f"Wrote {stats['written']} pages, {stats['unchanged']} unchanged, "
+        f"removed {stats['removed']}"
+    )
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateLimiter:
+    """
+    Per-client token buckets, local to one process.
+
+    Every client starts with ``burst`` tokens, gains ``rate`` tokens per
+    second up to ``burst``, and spends one per request.
+
+    Parameters
+    ----------
+    rate : float
+        The number of requests per second a client can sustain.
+    burst : int
+        The number of requests a client can make at once.
+    max_clients : int, optional
+        The number of clients tracked. The least recently seen client is
+        forgotten first, which gives it a full bucket again.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client):
+        """
+        Take a token from the bucket of a client.
+
+        Parameters
+        ----------
+        client : str
+            Identifies the client, e.g. its IP address.
+
+        Returns
+        -------
+        float
+            0 if the request is allowed, otherwise the number of seconds
+            until the client has a token again.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class ConcurrencyLimiter:
+    """
+    Cap the number of requests running at once in one process.
+
+    Requests over the cap queue for a free slot, for at most
+    ``queue_timeout`` seconds.
+
+    Parameters
+    ----------
+    limit : int
+        The number of requests allowed to run at once.
+    queue_timeout : float
+        The number of seconds a request waits for a slot.
+    """
+
+    def __init__(self, limit, queue_timeout):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self):
+        """
+        Wait for a free slot.
+
+        Returns
+        -------
+        bool
+            True if a slot was taken, False if the queue timeout expired.
+        """
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def release(self):
+        self._semaphore.release()
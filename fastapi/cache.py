@@ -0,0 +1,335 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from singleflight import SingleFlight
+
+
+class LocalCache:
+    """
+    In-memory LRU cache with expiring entries, local to one process.
+
+    Values are stored as they are, so the same object is returned to every
+    caller and must not be modified.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        The number of entries kept, the least recently used is evicted first.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key, value, ttl):
+        """
+        Set a key only if it is not already set.
+
+        Returns
+        -------
+        bool
+            True if the key was set.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= time.monotonic():
+                return False
+            self._entries[key] = (value, time.monotonic() + ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteCache:
+    """
+    Cache stored in an SQLite file, shared by every process on the host.
+
+    Values are bytes. Each thread keeps its own connection, and the database
+    uses WAL mode so readers in other workers do not block writers.
+
+    Parameters
+    ----------
+    path : str
+        The path of the cache database, created if needed.
+    purge_interval : float, optional
+        The minimum number of seconds between two purges of expired entries.
+    """
+
+    def __init__(self, path, purge_interval=60.0):
+        self.path = path
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._last_purge = time.time()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS cache (
+                       key TEXT PRIMARY KEY,
+                       value BLOB NOT NULL,
+                       expires REAL NOT NULL
+                   ) WITHOUT ROWID"""
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, now + ttl),
+        )
+        if now - self._last_purge >= self.purge_interval:
+            self._last_purge = now
+            conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+
+    def add(self, key, value, ttl):
+        """
+        Set a key only if it is not already set.
+
+        Returns
+        -------
+        bool
+            True if the key was set.
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires < ?", (key, now))
+            added = conn.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, now + ttl),
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisCache:
+    """
+    Cache stored in a Redis server, or any server speaking its protocol.
+
+    Values are bytes. Requires the redis package unless a client is given.
+
+    Parameters
+    ----------
+    url : str, optional
+        The URL of the server, e.g. "redis://127.0.0.1:6379/0".
+    client : object, optional
+        An existing client, e.g. a fakeredis.FakeRedis for local testing.
+    """
+
+    def __init__(self, url=None, client=None):
+        if client is None:
+            # Optional dependency, only needed when a Redis cache is configured
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def add(self, key, value, ttl):
+        """
+        Set a key only if it is not already set.
+
+        Returns
+        -------
+        bool
+            True if the key was set.
+        """
+        return bool(self.client.set(key, value, px=max(1, int(ttl * 1000)), nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class TieredCache:
+    """
+    Two-level cache: an in-process LocalCache in front of a shared backend.
+
+    Values are JSON-serializable results. The local level keeps them as
+    objects, the shared level as JSON. Misses are protected against
+    stampedes: within a process concurrent misses of a key are coalesced by
+    a SingleFlight, and across processes the first one to take a short lock
+    in the shared backend computes the value while the others poll the
+    shared backend for the result.
+
+    Parameters
+    ----------
+    shared : object, optional
+        The shared backend, e.g. a SQLiteCache or RedisCache, or None to
+        only cache within the process.
+    ttl : float, optional
+        The number of seconds an entry is kept.
+    max_local_entries : int, optional
+        The number of entries kept in the local level.
+    lock_timeout : float, optional
+        The number of seconds other processes wait for a result being
+        computed before computing it themselves.
+    flight : SingleFlight, optional
+        Coalesces concurrent misses, e.g. one whose counters are reported.
+    """
+
+    def __init__(
+        self, shared=None, ttl=30.0, max_local_entries=1024, lock_timeout=5.0, flight=None
+    ):
+        self.local = LocalCache(max_local_entries)
+        self.shared = shared
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.flight = flight or SingleFlight()
+
+    def _get_shared(self, key):
+        raw = self.shared.get(key)
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.local.set(key, value, self.ttl)
+        return value
+
+    def get_or_compute(self, key, compute, name="cache"):
+        """
+        Return the cached value of a key, computing and storing it on a miss.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        compute : callable
+            Called without arguments to compute the value on a miss.
+        name : str, optional
+            The kind of value, used for the single-flight counters.
+
+        Returns
+        -------
+        object
+            The cached or computed value. It is shared with other callers and
+            must not be modified.
+        """
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        return self.flight.do(name, key, lambda: self._load(key, compute))
+
+    def _load(self, key, compute):
+        """
+        Read a key missing from the local level from the shared level, or
+        compute it. Only one thread per process runs this for a given key.
+        """
+        # Set by a call for the same key that returned since the first check
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        if self.shared is None:
+            value = compute()
+            self.local.set(key, value, self.ttl)
+            return value
+
+        value = self._get_shared(key)
+        if value is not None:
+            return value
+
+        lock_key = "lock:" + key
+        locked = self.shared.add(lock_key, b"1", self.lock_timeout)
+        if not locked:
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+                value = self._get_shared(key)
+                if value is not None:
+                    return value
+        try:
+            value = compute()
+            self.shared.set(key, json.dumps(value).encode(), self.ttl)
+            self.local.set(key, value, self.ttl)
+        finally:
+            if locked:
+                self.shared.delete(lock_key)
+        return value
+
+
+def load_cache(spec, db_path, ttl=30.0, max_local_entries=1024, flight=None):
+    """
+    Create the cache described by a backend specification.
+
+    Parameters
+    ----------
+    spec : str
+        "none", "local", "sqlite", "sqlite:<path>" or a redis:// URL.
+    db_path : str
+        The path of the articles database, "sqlite" stores the cache next
+        to it.
+    ttl : float, optional
+        The number of seconds an entry is kept.
+    max_local_entries : int, optional
+        The number of entries kept in the in-process level.
+    flight : SingleFlight, optional
+        Coalesces concurrent misses.
+
+    Returns
+    -------
+    TieredCache or None
+        The cache, or None if caching is disabled.
+    """
+    kind, _, argument = spec.partition(":")
+    if kind == "none":
+        return None
+    if kind == "local":
+        shared = None
+    elif kind == "sqlite":
+        shared = SQLiteCache(argument or os.path.splitext(db_path)[0] + ".cache.db")
+    elif kind in ("redis", "rediss", "unix"):
+        shared = RedisCache(spec)
+    else:
+        raise ValueError(f"Unknown cache backend: {spec}")
+    return TieredCache(shared, ttl=ttl, max_local_entries=max_local_entries, flight=flight)
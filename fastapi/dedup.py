@@ -0,0 +1,202 @@
+import hashlib
+import re
+
+import numpy as np
+
+from related import keyword_terms
+
+
+# 16 bands of 4 rows give a ~50% chance of sharing a bucket at Jaccard 0.5
+# and a >99% chance at 0.8
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+# Estimated Jaccard similarity above which two articles are flagged
+DUPLICATE_THRESHOLD = 0.8
+
+# Features are hashed to 32 bits and permuted modulo a 31-bit prime, so the
+# products fit in 64-bit integers and the permutations can be vectorized
+MERSENNE_PRIME = (1 << 31) - 1
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Fixed seed, so signatures computed by different processes are comparable
+_random = np.random.default_rng(20240501)
+PERMUTATION_A = _random.integers(1, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _random.integers(0, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def stable_hash(text, size=8):
+    """
+    Hash a string to an integer that is the same in every process.
+
+    Parameters
+    ----------
+    text : str
+        The string to hash.
+    size : int, optional
+        The size of the hash in bytes.
+
+    Returns
+    -------
+    int
+        An unsigned integer of ``size`` bytes.
+    """
+    digest = hashlib.blake2b(text.encode(), digest_size=size).digest()
+    return int.from_bytes(digest, "little")
+
+
+def shingles(title, keywords):
+    """
+    Return the features compared when looking for duplicate articles.
+
+    Parameters
+    ----------
+    title : str
+        The title of the article.
+    keywords : str
+        The delimited keyword text of the article.
+
+    Returns
+    -------
+    set
+        The title words, title word pairs and keyword terms of the article.
+    """
+    words = WORD_PATTERN.findall((title or "").lower())
+    features = {f"w:{word}" for word in words}
+    features.update(f"p:{a} {b}" for a, b in zip(words, words[1:]))
+    features.update(f"k:{term}" for term in keyword_terms(keywords))
+    return features
+
+
+def minhash(features):
+    """
+    Compute the MinHash signature of a set of features.
+
+    Parameters
+    ----------
+    features : set
+        The features of the article.
+
+    Returns
+    -------
+    numpy.ndarray
+        NUM_PERMUTATIONS uint32 values, or None if there are no features.
+    """
+    if not features:
+        return None
+    hashes = np.array([stable_hash(feature, 4) for feature in features], dtype=np.uint64)
+    permuted = (PERMUTATION_A[:, None] * hashes[None, :] + PERMUTATION_B[:, None])
+    return (permuted % MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_buckets(signature):
+    """
+    Split a signature into its LSH bands and hash each band to a bucket.
+
+    Parameters
+    ----------
+    signature : numpy.ndarray
+        The MinHash signature of an article.
+
+    Returns
+    -------
+    list
+        A list of (band, bucket) tuples with signed 64-bit buckets, so they
+        fit in an SQLite INTEGER column.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        bucket = stable_hash(",".join(map(str, rows.tolist())))
+        buckets.append((band, bucket - (1 << 64) if bucket >= 1 << 63 else bucket))
+    return buckets
+
+
+def similarity(signature, other):
+    """
+    Estimate the Jaccard similarity of two articles from their signatures.
+
+    Parameters
+    ----------
+    signature : numpy.ndarray
+        The MinHash signature of the first article.
+    other : numpy.ndarray
+        The MinHash signature of the second article.
+
+    Returns
+    -------
+    float
+        The fraction of the signature positions that are equal.
+    """
+    return float(np.mean(signature == other))
+
+
+def index_articles(conn, since_rowid):
+    """
+    Sign the articles added since the last run and flag likely duplicates.
+
+    Each new article is compared only with the articles sharing one of its
+    LSH buckets, so the cost per article does not grow with the corpus.
+    Duplicates are flagged in the duplicates table rather than deleted.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_rowid : int
+        The highest article_info rowid that was already processed.
+
+    Returns
+    -------
+    int or None
+        The highest rowid processed, or None if there were no new articles.
+    """
+    c = conn.cursor()
+    c.execute(
+        """SELECT rowid, title, keywords FROM article_info
+           WHERE rowid > ? ORDER BY rowid""",
+        (since_rowid,),
+    )
+    rows = c.fetchall()
+
+    for rowid, title, keywords in rows:
+        signature = minhash(shingles(title, keywords))
+        if signature is None:
+            continue
+        buckets = band_buckets(signature)
+
+        candidates = set()
+        for band, bucket in buckets:
+            c.execute(
+                "SELECT article_id FROM minhash_buckets WHERE band = ? AND bucket = ?",
+                (band, bucket),
+            )
+            candidates.update(article_id for (article_id,) in c.fetchall())
+
+        for candidate in sorted(candidates):
+            c.execute(
+                "SELECT signature FROM article_minhash WHERE article_id = ?",
+                (candidate,),
+            )
+            other = np.frombuffer(c.fetchone()[0], dtype="<u4")
+            estimate = similarity(signature, other)
+            if estimate >= DUPLICATE_THRESHOLD:
+                c.execute(
+                    """INSERT OR REPLACE INTO duplicates
+                       (article_id, duplicate_of, similarity) VALUES (?, ?, ?)""",
+                    (rowid, candidate, estimate),
+                )
+                break
+
+        c.execute(
+            "INSERT OR REPLACE INTO article_minhash (article_id, signature) VALUES (?, ?)",
+            (rowid, signature.astype("<u4").tobytes()),
+        )
+        c.executemany(
+            """INSERT OR IGNORE INTO minhash_buckets (band, bucket, article_id)
+               VALUES (?, ?, ?)""",
+            [(band, bucket, rowid) for band, bucket in buckets],
+        )
+
+    return rows[-1][0] if rows else None
@@ -0,0 +1,174 @@
+import argparse
+import html
+import json
+import os
+import re
+import sqlite3
+import time
+
+import ingest
+from settings import settings
+
+
+# Name of the digest watermark in the ingest_state table, which holds the
+# highest saved_search_matches sequence number written out
+WATERMARK = "digest_matches"
+
+
+def fetch_new_matches(conn, since_sequence):
+    """
+    Read the saved search matches found since the last digest.
+
+    The matches are recorded at ingest by saved_searches.py, and read here
+    in one range query on their sequence number.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_sequence : int
+        The highest match sequence number already covered by a digest.
+
+    Returns
+    -------
+    tuple
+        A dictionary per saved search with new matches, holding the search
+        and its articles, and the highest sequence number read.
+    """
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        """SELECT saved_search_matches.sequence, saved_searches.name,
+                  saved_searches.term, saved_searches.min_score,
+                  article_info.title, article_info.doi, article_info.date,
+                  article_info.journal, article_info.publisher, model_responses.score
+           FROM saved_search_matches
+           JOIN saved_searches ON saved_searches.id = saved_search_matches.search_id
+           JOIN article_info ON article_info.rowid = saved_search_matches.article_id
+           LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+           WHERE saved_search_matches.sequence > ?
+           ORDER BY saved_searches.name, saved_search_matches.article_id""",
+        (since_sequence,),
+    ).fetchall()
+    conn.row_factory = None
+    results = {}
+    for row in rows:
+        article = dict(row)
+        search = {name: article.pop(name) for name in ("name", "term", "min_score")}
+        article.pop("sequence")
+        results.setdefault(search["name"], {"search": search, "articles": []})["articles"].append(
+            article
+        )
+    return list(results.values()), max((row["sequence"] for row in rows), default=since_sequence)
+
+
+def render_markdown(search, articles):
+    lines = [f"# {search['name']}", "", f"{len(articles)} new articles", ""]
+    for article in articles:
+        lines.append(
+            f"- [{article['title']}](https://doi.org/{article['doi']}) "
+            f"({article['journal'] or 'unknown journal'}, {article['date']}, score {article['score']})"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def render_html(search, articles):
+    items = "\n".join(
+        f'<li><a href="https://doi.org/{html.escape(article["doi"])}">{html.escape(article["title"] or article["doi"])}</a> '
+        f'({html.escape(article["journal"] or "unknown journal")}, {html.escape(str(article["date"]))}, '
+        f'score {html.escape(str(article["score"]))})</li>'
+        for article in articles
+    )
+    return (
+        f"<!DOCTYPE html>\n<html lang=\"en\">\n<head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(search['name'])} | Peptide Digest</title></head>\n<body>\n"
+        f"<h1>{html.escape(search['name'])}</h1>\n<p>{len(articles)} new articles</p>\n"
+        f"<ul>\n{items}\n</ul>\n</body>\n</html>\n"
+    )
+
+
+def render_json(search, articles):
+    fields = ["title", "doi", "date", "journal", "publisher", "score"]
+    return json.dumps(
+        {
+            "search": search,
+            "articles": [{name: article[name] for name in fields} for article in articles],
+        },
+        indent=1,
+    )
+
+
+RENDERERS = {
+    "md": render_markdown,
+    "html": render_html,
+    "json": render_json,
+}
+
+
+def file_name(name):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)
+
+
+def generate_digests(conn, output_dir, formats=("md", "html", "json")):
+    """
+    Write a digest of the new matches of every saved search.
+
+    The saved searches are matched at ingest, this only writes out the
+    matches recorded since the previous run. An article whose model response
+    arrives late is matched when the response is ingested, and so lands in
+    the next digest. The watermark only moves once every digest is written,
+    so a failed run is repeated in full by the next one.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    output_dir : str
+        Digests are written to <output_dir>/<search name>/<run time>.<format>.
+    formats : sequence, optional
+        Any of the formats in RENDERERS.
+
+    Returns
+    -------
+    dict
+        The number of new articles matched by each saved search.
+    """
+    unknown = set(formats) - set(RENDERERS)
+    if unknown:
+        raise ValueError(f"Unknown digest formats: {sorted(unknown)}")
+
+    results, last_sequence = fetch_new_matches(conn, ingest.get_watermark(conn, WATERMARK))
+    run = time.strftime("%Y%m%d-%H%M%S")
+    for result in results:
+        directory = os.path.join(output_dir, file_name(result["search"]["name"]))
+        os.makedirs(directory, exist_ok=True)
+        for extension in formats:
+            path = os.path.join(directory, f"{run}.{extension}")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(RENDERERS[extension](result["search"], result["articles"]))
+            os.replace(path + ".tmp", path)
+
+    with conn:
+        ingest.set_watermark(conn, WATERMARK, last_sequence)
+    return {result["search"]["name"]: len(result["articles"]) for result in results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write a digest of the new matches of every saved search."
+    )
+    parser.add_argument("--db-path", default=settings.db_path)
+    parser.add_argument("--output-dir", default=settings.digest_dir)
+    parser.add_argument("--formats", default=",".join(settings.digest_formats))
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path)
+    # Records the matches of the articles ingested since the last run
+    ingest.process_new_articles(conn)
+    print(
+        generate_digests(
+            conn,
+            args.output_dir,
+            [extension for extension in args.formats.split(",") if extension],
+        )
+    )
+    conn.close()
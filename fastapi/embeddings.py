@@ -0,0 +1,432 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from settings import settings
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+# Number of indexed articles above which the optional HNSW index is used
+ANN_THRESHOLD = 50000
+
+
+class HashingEmbedder:
+    """
+    Embed text by hashing its words and word pairs into a fixed-size vector.
+
+    The embedder has no model to download and no state, so it is fast,
+    deterministic across processes and suitable for tests. It only captures
+    lexical overlap, so a learned model should be used in production.
+
+    Parameters
+    ----------
+    dim : int, optional
+        The number of dimensions of the embeddings.
+    """
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def _bucket(self, feature):
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def embed(self, texts):
+        """
+        Embed a list of texts.
+
+        Parameters
+        ----------
+        texts : list
+            The texts to embed.
+
+        Returns
+        -------
+        numpy.ndarray
+            A float32 array of shape (len(texts), dim) with unit-length rows.
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall((text or "").lower())
+            features = tokens + [" ".join(pair) for pair in zip(tokens, tokens[1:])]
+            for feature in features:
+                bucket, sign = self._bucket(feature)
+                vectors[i, bucket] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class SentenceTransformerEmbedder:
+    """
+    Embed text with a sentence-transformers model running on the CPU.
+
+    Parameters
+    ----------
+    model_name : str
+        The name or path of the sentence-transformers model.
+    """
+
+    def __init__(self, model_name):
+        # Optional dependency, only needed when a learned model is configured
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers:{model_name}"
+
+    def embed(self, texts):
+        return self.model.encode(
+            list(texts), normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+def load_embedder(spec):
+    """
+    Create the embedder described by a model specification.
+
+    Parameters
+    ----------
+    spec : str
+        Either "hashing", "hashing:<dim>" or
+        "sentence-transformers:<model name>".
+
+    Returns
+    -------
+    object
+        An embedder with ``name``, ``dim`` and ``embed(texts)``.
+    """
+    kind, _, argument = spec.partition(":")
+    if kind == "hashing":
+        return HashingEmbedder(int(argument)) if argument else HashingEmbedder()
+    if kind == "sentence-transformers":
+        return SentenceTransformerEmbedder(argument)
+    raise ValueError(f"Unknown embedding model: {spec}")
+
+
+def index_paths(db_path):
+    """
+    Return the paths of the files holding the embeddings of a database.
+
+    Parameters
+    ----------
+    db_path : str
+        The path of the articles database.
+
+    Returns
+    -------
+    dict
+        The paths of the float32 matrix, appended to in place, of the DOI of
+        each row, one per line, of the optional HNSW index and of the JSON
+        metadata, which is replaced atomically once the other files are
+        written and tells readers how many rows are complete.
+    """
+    base = os.path.splitext(db_path)[0]
+    return {
+        "matrix": base + ".embeddings.f32",
+        "dois": base + ".embeddings.dois",
+        "ann": base + ".embeddings.hnsw",
+        "meta": base + ".embeddings.json",
+    }
+
+
+def read_meta(paths):
+    try:
+        with open(paths["meta"]) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_meta(paths, meta):
+    with open(paths["meta"] + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(paths["meta"] + ".tmp", paths["meta"])
+
+
+def database_path(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def embedding_text(title, summary):
+    return f"{title or ''}\n{summary or ''}"
+
+
+def update_ann(paths, meta, matrix, new_rows, changed_rows):
+    """
+    Add new and re-embedded rows to the HNSW index, if it is used.
+
+    The index is only kept for corpora of at least ANN_THRESHOLD articles
+    and when hnswlib is installed. It is extended in place and saved next
+    to the matrix, so the API only loads it.
+
+    Parameters
+    ----------
+    paths : dict
+        The paths returned by index_paths().
+    meta : dict
+        The metadata of the index before this update.
+    matrix : numpy.ndarray
+        Every embedding, after this update.
+    new_rows : range
+        The rows appended by this update.
+    changed_rows : list
+        The existing rows re-embedded by this update.
+
+    Returns
+    -------
+    int
+        The number of rows in the saved HNSW index, 0 if there is none.
+    """
+    if len(matrix) < ANN_THRESHOLD:
+        return 0
+    try:
+        import hnswlib
+    except ImportError:
+        return 0
+    index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+    if meta.get("ann_rows") and meta["ann_rows"] == new_rows.start:
+        index.load_index(paths["ann"], max_elements=len(matrix))
+        # Existing labels are updated in place by add_items
+        labels = np.array(list(changed_rows) + list(new_rows), dtype=np.int64)
+    else:
+        index.init_index(max_elements=len(matrix), ef_construction=200, M=16)
+        labels = np.arange(len(matrix))
+    if len(labels):
+        index.add_items(np.asarray(matrix[labels]), labels)
+    index.save_index(paths["ann"] + ".tmp")
+    os.replace(paths["ann"] + ".tmp", paths["ann"])
+    return len(matrix)
+
+
+def index_articles(conn, since_rowid, embedder=None):
+    """
+    Embed the articles added since the last run, and the earlier ones whose
+    summary has arrived since they were embedded from their title alone.
+
+    New rows are appended to the matrix file and re-embedded rows are
+    overwritten in place, so the cost of an update depends on the number of
+    new articles, not on the size of the index. The metadata is replaced
+    last, so readers never use rows that are not completely written. When
+    the model changes, every article is embedded again.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_rowid : int
+        The highest article_info rowid that was already processed.
+    embedder : object, optional
+        The embedder, by default the one configured by embedding_model.
+
+    Returns
+    -------
+    int or None
+        The highest rowid processed, or None if there was nothing to do.
+    """
+    embedder = embedder or load_embedder(settings.embedding_model)
+    paths = index_paths(database_path(conn))
+    meta = read_meta(paths)
+    c = conn.cursor()
+    if meta is None or meta["model"] != embedder.name or "rows" not in meta:
+        # Embeddings from another model, or in the earlier .npy format, are
+        # not usable, start over
+        c.execute("DELETE FROM article_embeddings")
+        for path in (paths["matrix"], paths["dois"], paths["ann"]):
+            if os.path.exists(path):
+                os.remove(path)
+        meta = {
+            "model": embedder.name,
+            "dim": embedder.dim,
+            "rows": 0,
+            "dois_bytes": 0,
+            "ann_rows": 0,
+        }
+        since_rowid = 0
+    rows = meta["rows"]
+
+    c.execute(
+        """SELECT article_info.rowid, article_info.doi, article_info.title,
+                  model_responses.summary
+           FROM article_info
+           LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+           WHERE article_info.rowid > ?
+           ORDER BY article_info.rowid""",
+        (since_rowid,),
+    )
+    read = c.fetchall()
+    # Search results are looked up by DOI, articles without one are left out
+    new = [row for row in read if row[1] is not None]
+    c.execute(
+        """SELECT article_embeddings.row, article_info.title, model_responses.summary
+           FROM article_embeddings
+           JOIN article_info ON article_info.rowid = article_embeddings.article_id
+           JOIN model_responses ON article_info.doi = model_responses.doi
+           WHERE article_embeddings.summarized = 0 AND model_responses.summary IS NOT NULL"""
+    )
+    changed = c.fetchall()
+    if not new and not changed:
+        return read[-1][0] if read else None
+
+    # Both files are appended to, after dropping anything a failed run wrote
+    # past the rows recorded in the metadata
+    with open(paths["matrix"], "ab") as f:
+        f.truncate(rows * embedder.dim * 4)
+        if new:
+            f.write(
+                embedder.embed([embedding_text(title, summary) for _, _, title, summary in new])
+                .astype(np.float32)
+                .tobytes()
+            )
+    with open(paths["dois"], "ab") as f:
+        f.truncate(meta.get("dois_bytes", 0))
+        f.write("".join(doi + "\n" for _, doi, _, _ in new).encode())
+        meta["dois_bytes"] = f.tell()
+    total = rows + len(new)
+    matrix = np.memmap(paths["matrix"], dtype=np.float32, mode="r+", shape=(total, embedder.dim))
+    if changed:
+        matrix[[row for row, _, _ in changed]] = embedder.embed(
+            [embedding_text(title, summary) for _, title, summary in changed]
+        )
+    matrix.flush()
+
+    c.executemany(
+        "INSERT OR REPLACE INTO article_embeddings (article_id, row, summarized) VALUES (?, ?, ?)",
+        [
+            (rowid, rows + i, summary is not None)
+            for i, (rowid, _, _, summary) in enumerate(new)
+        ],
+    )
+    c.executemany(
+        "UPDATE article_embeddings SET summarized = 1 WHERE row = ? AND summarized = 0",
+        [(row,) for row, _, _ in changed],
+    )
+    meta["ann_rows"] = update_ann(
+        paths, meta, matrix, range(rows, total), [row for row, _, _ in changed]
+    )
+    meta["rows"] = total
+    write_meta(paths, meta)
+    return read[-1][0] if read else since_rowid
+
+
+class EmbeddingIndex:
+    """
+    Nearest-neighbour index over the summaries of the articles.
+
+    The embeddings are written by the ingest step index_articles() next to
+    the database, and memory-mapped here for searching. The index only
+    reads them, reloading when the ingest step has written new ones, or
+    when the database path moves to a new snapshot.
+
+    Parameters
+    ----------
+    db_path : str or callable
+        The path of the articles database, or a function returning it that
+        is called at every refresh, such as SnapshotReader.current_path.
+    embedder : object
+        The embedder used for the queries, the same model as the articles.
+    refresh_interval : float, optional
+        The minimum number of seconds between two checks for new embeddings.
+    """
+
+    def __init__(self, db_path, embedder, refresh_interval=60.0):
+        self.db_path = db_path
+        self.paths = None
+        self.embedder = embedder
+        self.refresh_interval = refresh_interval
+        self.matrix = np.zeros((0, embedder.dim), dtype=np.float32)
+        self.dois = []
+        self._loaded_mtime = None
+        self._last_refresh = 0.0
+        self._ann = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.dois)
+
+    def refresh(self, force=False):
+        """
+        Reload the embeddings if they changed, at most once per refresh interval.
+
+        Parameters
+        ----------
+        force : bool, optional
+            Check even if the refresh interval has not elapsed.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+        try:
+            paths = index_paths(self.db_path() if callable(self.db_path) else self.db_path)
+            mtime = os.stat(paths["meta"]).st_mtime
+        except FileNotFoundError:
+            # No snapshot or no embeddings yet, keep what is loaded
+            return
+        if paths == self.paths and mtime == self._loaded_mtime:
+            return
+
+        meta = read_meta(paths)
+        if meta is None or meta["model"] != self.embedder.name or not meta.get("rows"):
+            return
+        matrix = np.memmap(
+            paths["matrix"], dtype=np.float32, mode="r", shape=(meta["rows"], meta["dim"])
+        )
+        with open(paths["dois"]) as f:
+            dois = f.read().splitlines()[: meta["rows"]]
+        ann = None
+        if meta.get("ann_rows") == meta["rows"]:
+            try:
+                import hnswlib
+
+                ann = hnswlib.Index(space="ip", dim=meta["dim"])
+                ann.load_index(paths["ann"], max_elements=meta["rows"])
+                ann.set_ef(100)
+            except (ImportError, RuntimeError):
+                ann = None
+        with self._lock:
+            self.matrix, self.dois, self._ann = matrix, dois, ann
+            self.paths, self._loaded_mtime = paths, mtime
+
+    def search(self, query, k=10):
+        """
+        Find the articles whose summaries are closest to a query.
+
+        Parameters
+        ----------
+        query : str
+            The free-text query.
+        k : int, optional
+            The number of articles to return.
+
+        Returns
+        -------
+        list
+            A list of (DOI, cosine similarity) tuples, most similar first.
+        """
+        with self._lock:
+            matrix, dois, ann = self.matrix, self.dois, self._ann
+        k = min(k, len(dois))
+        if k == 0:
+            return []
+        vector = self.embedder.embed([query])[0]
+
+        if ann is not None:
+            labels, distances = ann.knn_query(vector, k=k)
+            return [
+                (dois[label], float(1.0 - distance))
+                for label, distance in zip(labels[0], distances[0])
+            ]
+
+        similarities = matrix @ vector
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(dois[i], float(similarities[i])) for i in top]
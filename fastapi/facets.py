@@ -0,0 +1,151 @@
+# Width of the score bands used by the score_band facet
+SCORE_BAND_WIDTH = 2
+
+# SQL expressions producing the value of each facet for a joined row
+FACET_COLUMNS = {
+    "journal": "article_info.journal",
+    "publisher": "article_info.publisher",
+    "year": "CAST(strftime('%Y', article_info.date_epoch, 'unixepoch') AS INTEGER)",
+    "score_band": f"CAST(model_responses.score_num / {SCORE_BAND_WIDTH} AS INTEGER) * {SCORE_BAND_WIDTH}",
+}
+
+
+def build_filters(
+    term=None,
+    date_from=None,
+    date_to=None,
+    min_score=None,
+    max_score=None,
+    exclude_duplicates=False,
+    **facets,
+):
+    """
+    Build the WHERE clause shared by the search and facet queries.
+
+    Parameters
+    ----------
+    term : str, optional
+        The free-text term matched against keywords and metadata.
+    date_from : int, optional
+        Only match articles published at or after this Unix timestamp.
+    date_to : int, optional
+        Only match articles published before this Unix timestamp.
+    min_score : float, optional
+        Only match articles scored at or above this value.
+    max_score : float, optional
+        Only match articles scored at or below this value.
+    exclude_duplicates : bool, optional
+        Leave out articles flagged as duplicates of an earlier article.
+    **facets : list
+        Selected values for any of the facets in FACET_COLUMNS. Values within
+        a facet are OR'ed together, different facets are AND'ed.
+
+    Returns
+    -------
+    tuple
+        The WHERE clause (without the WHERE keyword) and its parameters.
+    """
+    clauses = []
+    params = []
+    if term is not None:
+        clauses.append(
+            """(article_info.keywords LIKE '%' || ? || '%'
+                OR model_responses.metadata LIKE '%' || ? || '%')"""
+        )
+        params.extend([term, term])
+    if date_from is not None:
+        clauses.append("article_info.date_epoch >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        clauses.append("article_info.date_epoch < ?")
+        params.append(date_to)
+    if min_score is not None:
+        clauses.append("model_responses.score_num >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append("model_responses.score_num <= ?")
+        params.append(max_score)
+    if exclude_duplicates:
+        clauses.append(
+            "article_info.rowid NOT IN (SELECT article_id FROM duplicates)"
+        )
+    for name, values in facets.items():
+        if values:
+            placeholders = ", ".join("?" for _ in values)
+            clauses.append(f"{FACET_COLUMNS[name]} IN ({placeholders})")
+            params.extend(values)
+    return " AND ".join(clauses) or "1", params
+
+
+def facet_counts(
+    conn,
+    term=None,
+    date_from=None,
+    date_to=None,
+    min_score=None,
+    max_score=None,
+    exclude_duplicates=False,
+    **facets,
+):
+    """
+    Count the matching articles for every value of every facet.
+
+    All facets are counted in a single statement: the matching rows are
+    computed once in a CTE and grouped per facet with UNION ALL.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    term : str, optional
+        The free-text search term.
+    date_from : int, optional
+        Only count articles published at or after this Unix timestamp.
+    date_to : int, optional
+        Only count articles published at or before this Unix timestamp.
+    min_score : float, optional
+        Only count articles scored at or above this value.
+    max_score : float, optional
+        Only count articles scored at or below this value.
+    exclude_duplicates : bool, optional
+        Leave out articles flagged as duplicates of an earlier article.
+    **facets : list
+        Selected facet values, as accepted by build_filters.
+
+    Returns
+    -------
+    dict
+        A dictionary mapping each facet name to a list of value/count
+        dictionaries, ordered by descending count.
+    """
+    where_clause, params = build_filters(
+        term,
+        date_from,
+        date_to,
+        min_score,
+        max_score,
+        exclude_duplicates,
+        **facets,
+    )
+    columns = ", ".join(f"{expr} AS {name}" for name, expr in FACET_COLUMNS.items())
+    groups = " UNION ALL ".join(
+        f"""SELECT '{name}', {name}, COUNT(*) FROM matched
+            WHERE {name} IS NOT NULL GROUP BY {name}"""
+        for name in FACET_COLUMNS
+    )
+    query = f"""WITH matched AS (
+                    SELECT {columns}
+                    FROM article_info
+                    LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+                    WHERE {where_clause}
+                )
+                {groups}"""
+    c = conn.cursor()
+    c.execute(query, params)
+
+    counts = {name: [] for name in FACET_COLUMNS}
+    for name, value, count in c.fetchall():
+        counts[name].append({"value": value, "count": count})
+    for values in counts.values():
+        values.sort(key=lambda facet: (-facet["count"], str(facet["value"])))
+    return counts
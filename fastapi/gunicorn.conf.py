@@ -0,0 +1,33 @@
+# Production profile for the API: gunicorn managing uvicorn workers.
+#
+#   cd fastapi && gunicorn -c gunicorn.conf.py peptide_digest_api:app
+#
+# Sizing and paths come from settings.py (PEPTIDE_DIGEST_* variables or the
+# JSON file named by PEPTIDE_DIGEST_SETTINGS).
+import sqlite3
+
+import ingest
+from settings import settings
+
+bind = settings.bind
+workers = settings.workers
+worker_class = "uvicorn.workers.UvicornWorker"
+# Recycle workers now and then to bound memory growth of the in-memory indexes
+max_requests = 10000
+max_requests_jitter = 1000
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    # Bring the derived data up to date once, instead of once per worker
+    if not settings.snapshot_dir and settings.ingest_on_startup:
+        conn = sqlite3.connect(settings.db_path)
+        try:
+            ingest.process_new_articles(conn)
+        finally:
+            conn.close()
+    # Workers are forked from this process and share its settings module, so
+    # this stops their lifespan from running the ingest again
+    settings.ingest_on_startup = False
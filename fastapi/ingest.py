@@ -0,0 +1,105 @@
+import sqlite3
+import sys
+
+import dedup
+import embeddings
+import keywords
+import metadata_fields
+import migrations
+import resolve
+import saved_searches
+import stats
+from settings import settings
+
+
+# Steps run on the articles added since the step last ran. Each step is
+# called with the highest rowid it already processed and returns the highest
+# rowid it processed in this run, or None if there was nothing to do.
+STEPS = [
+    ("dedup", dedup.index_articles),
+    ("aliases", resolve.index_articles),
+    # After dedup, since duplicates are left out of the following steps
+    (saved_searches.STEP_NAME, saved_searches.index_articles),
+    (stats.STEP_NAME, stats.index_articles),
+    ("keywords", keywords.index_articles),
+    ("metadata", metadata_fields.index_articles),
+    ("embeddings", embeddings.index_articles),
+]
+
+
+def get_watermark(conn, name):
+    """
+    Return the highest article_info rowid processed by an ingest step.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    name : str
+        The name of the ingest step.
+
+    Returns
+    -------
+    int
+        The rowid, or 0 if the step never ran.
+    """
+    row = conn.execute(
+        "SELECT last_rowid FROM ingest_state WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def set_watermark(conn, name, last_rowid):
+    """
+    Record the highest article_info rowid processed by an ingest step.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    name : str
+        The name of the ingest step.
+    last_rowid : int
+        The highest rowid processed.
+    """
+    conn.execute(
+        "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES (?, ?)",
+        (name, last_rowid),
+    )
+
+
+def process_new_articles(conn):
+    """
+    Bring all derived data up to date with the articles in the database.
+
+    This should be run by the writer after inserting new articles. Every
+    step commits together with its watermark, so an interrupted run picks up
+    where it stopped.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+
+    Returns
+    -------
+    dict
+        The new watermark of every step that processed articles.
+    """
+    migrations.migrate(conn)
+
+    processed = {}
+    for name, step in STEPS:
+        with conn:
+            last_rowid = step(conn, get_watermark(conn, name))
+            if last_rowid is not None:
+                set_watermark(conn, name, last_rowid)
+                processed[name] = last_rowid
+    return processed
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else settings.db_path
+    conn = sqlite3.connect(db_path)
+    print(process_new_articles(conn))
+    conn.close()
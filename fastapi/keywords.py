@@ -0,0 +1,118 @@
+import re
+
+from suggest import KEYWORD_SPLIT
+
+
+# Hyphenated words are kept whole, as in "glp-1"
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+# Version of normalize_keyword() and lemma(). Bump it when they change, and
+# migrations.migrate() empties the tables filled with normalized words for
+# the next ingest to rebuild them.
+NORMALIZATION_VERSION = 1
+
+# Endings never stripped, as in "mass", "virus", "analysis" or "dynamics"
+SINGULAR_ENDINGS = ("ss", "us", "is", "ics")
+
+
+def lemma(word):
+    """
+    Reduce a lowercased word to its singular form.
+
+    Only regular English plurals are handled, which covers the nouns found
+    in keywords: "peptides" becomes "peptide" and "studies" becomes "study".
+
+    Parameters
+    ----------
+    word : str
+        The lowercased word.
+
+    Returns
+    -------
+    str
+        The singular form of the word.
+    """
+    if len(word) <= 3 or not word.endswith("s") or word.endswith(SINGULAR_ENDINGS):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "uses")):
+        return word[:-2]
+    return word[:-1]
+
+
+def normalize_keyword(keyword):
+    """
+    Normalize a keyword, so that variants of it are indexed together.
+
+    Parameters
+    ----------
+    keyword : str
+        A keyword, e.g. "Stapled Peptides".
+
+    Returns
+    -------
+    str
+        The lowercased singular words of the keyword separated by single
+        spaces, e.g. "stapled peptide", or "" if it has no words.
+    """
+    return " ".join(lemma(word) for word in WORD_PATTERN.findall(keyword.lower()))
+
+
+def keyword_list(keywords):
+    """
+    Split the keyword text of an article into normalized keywords.
+
+    Parameters
+    ----------
+    keywords : str
+        The delimited keyword text of the article.
+
+    Returns
+    -------
+    set
+        The normalized keywords of the article.
+    """
+    normalized = (normalize_keyword(keyword) for keyword in KEYWORD_SPLIT.split(keywords or ""))
+    return {keyword for keyword in normalized if keyword}
+
+
+def index_articles(conn, since_rowid):
+    """
+    Add the keywords of the articles added since the last run to article_keywords.
+
+    Articles flagged as duplicates are not indexed.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_rowid : int
+        The highest article_info rowid that was already processed.
+
+    Returns
+    -------
+    int or None
+        The highest rowid processed, or None if there were no new articles.
+    """
+    c = conn.cursor()
+    c.execute(
+        """SELECT article_info.rowid, article_info.keywords,
+                  duplicates.article_id IS NOT NULL
+           FROM article_info
+           LEFT JOIN duplicates ON duplicates.article_id = article_info.rowid
+           WHERE article_info.rowid > ?
+           ORDER BY article_info.rowid""",
+        (since_rowid,),
+    )
+    rows = c.fetchall()
+    c.executemany(
+        "INSERT OR IGNORE INTO article_keywords (keyword, article_id) VALUES (?, ?)",
+        [
+            (keyword, rowid)
+            for rowid, keywords, is_duplicate in rows
+            if not is_duplicate
+            for keyword in keyword_list(keywords)
+        ],
+    )
+    return rows[-1][0] if rows else None
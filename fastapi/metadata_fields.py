@@ -0,0 +1,175 @@
+import re
+
+from keywords import normalize_keyword
+
+
+# Labels of the metadata lines parsed, lowercased and without a plural "s",
+# mapped to the field they hold
+FIELD_LABELS = {
+    "peptide sequence": "sequence",
+    "sequence": "sequence",
+    "target": "target",
+    "biological target": "target",
+    "method": "method",
+    "methodology": "method",
+    "computational method": "method",
+}
+
+# "Label: value" lines, optionally in a Markdown list or in bold
+LINE_PATTERN = re.compile(r"^[\s*\-•]*([A-Za-z ]+?)s?[\s*]*:[\s*]*(.*)$", re.MULTILINE)
+LIST_SPLIT = re.compile(r"[,;]")
+MISSING_VALUES = {"n/a", "na", "none", "not reported", "not specified", "unknown"}
+
+# Peptides in the one-letter code of the standard amino acids, written in
+# uppercase, so words such as "cyclic" or "None" are not taken for sequences
+SEQUENCE_PATTERN = re.compile(r"^[ACDEFGHIKLMNPQRSTVWY]{3,}$")
+TERMINAL_GROUPS = re.compile(r"^(?:Ac|H)-|-(?:NH2|OH)$")
+
+
+def parse_sequences(text):
+    """
+    Extract the peptide sequences listed in a metadata value.
+
+    Parameters
+    ----------
+    text : str
+        The value of a sequence line, e.g. "Ac-GLPGKLLQ-NH2, HAEGTFTSD".
+
+    Returns
+    -------
+    set
+        The sequences, without their terminal groups.
+    """
+    sequences = set()
+    for token in re.split(r"[,;/\s]+", text):
+        token = TERMINAL_GROUPS.sub("", token.strip(".()[]`'\""))
+        if SEQUENCE_PATTERN.match(token):
+            sequences.add(token)
+    return sequences
+
+
+def parse_metadata(metadata):
+    """
+    Extract the peptide sequences, targets and methods from model metadata.
+
+    Only lines of the form "Label: value" with a label in FIELD_LABELS are
+    read, the rest of the free text is ignored.
+
+    Parameters
+    ----------
+    metadata : str
+        The metadata written by the model.
+
+    Returns
+    -------
+    set
+        (field, value) pairs. Sequences are kept as written, targets and
+        methods are normalized like keywords.
+    """
+    values = set()
+    for label, text in LINE_PATTERN.findall(metadata or ""):
+        field = FIELD_LABELS.get(" ".join(label.lower().split()))
+        if field == "sequence":
+            values.update(("sequence", sequence) for sequence in parse_sequences(text))
+        elif field is not None:
+            values.update(
+                (field, normalize_keyword(item))
+                for item in LIST_SPLIT.split(text)
+                if normalize_keyword(item) and item.strip(" .*").lower() not in MISSING_VALUES
+            )
+    return values
+
+
+# Name of the watermark on the model_responses rowid, which catches the
+# responses written after their article was ingested
+RESPONSES_WATERMARK = "metadata_responses"
+
+ARTICLE_QUERY = """SELECT article_info.rowid, model_responses.metadata,
+                          duplicates.article_id IS NOT NULL
+                   FROM article_info
+                   LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+                   LEFT JOIN duplicates ON duplicates.article_id = article_info.rowid"""
+
+
+def store_fields(conn, rows):
+    """
+    Parse the metadata of some articles into the lookup tables.
+
+    Sequences go to article_peptides, targets and methods to
+    article_metadata_terms. Articles flagged as duplicates are skipped.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    rows : list
+        The articles, as read by ARTICLE_QUERY.
+    """
+    peptides = []
+    terms = []
+    for rowid, metadata, is_duplicate in rows:
+        if is_duplicate:
+            continue
+        for field, value in parse_metadata(metadata):
+            if field == "sequence":
+                peptides.append((value, rowid))
+            else:
+                terms.append((field, value, rowid))
+    conn.executemany(
+        "INSERT OR IGNORE INTO article_peptides (sequence, article_id) VALUES (?, ?)",
+        peptides,
+    )
+    conn.executemany(
+        """INSERT OR IGNORE INTO article_metadata_terms (field, value, article_id)
+           VALUES (?, ?, ?)""",
+        terms,
+    )
+
+
+def index_articles(conn, since_rowid):
+    """
+    Parse the metadata of the articles added since the last run.
+
+    The model response of an article can be written after the article was
+    ingested. Articles whose response is newer than the previous run are
+    parsed again, found from a second watermark on the model_responses rowid.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_rowid : int
+        The highest article_info rowid that was already processed.
+
+    Returns
+    -------
+    int or None
+        The highest rowid processed, or None if there were no new articles.
+    """
+    rows = conn.execute(
+        ARTICLE_QUERY + " WHERE article_info.rowid > ? ORDER BY article_info.rowid",
+        (since_rowid,),
+    ).fetchall()
+    store_fields(conn, rows)
+
+    row = conn.execute(
+        "SELECT last_rowid FROM ingest_state WHERE name = ?", (RESPONSES_WATERMARK,)
+    ).fetchone()
+    since_response = row[0] if row else 0
+    (until_response,) = conn.execute("SELECT MAX(rowid) FROM model_responses").fetchone()
+    if until_response is not None and until_response > since_response:
+        # The articles above since_rowid were just parsed with their response
+        store_fields(
+            conn,
+            conn.execute(
+                ARTICLE_QUERY
+                + """ WHERE model_responses.rowid > ? AND model_responses.rowid <= ?
+                        AND article_info.rowid <= ?""",
+                (since_response, until_response, since_rowid),
+            ).fetchall(),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES (?, ?)",
+            (RESPONSES_WATERMARK, until_response),
+        )
+    return rows[-1][0] if rows else None
@@ -0,0 +1,448 @@
+import calendar
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+from keywords import NORMALIZATION_VERSION
+from settings import settings
+
+
+# Tables filled with normalized keywords and words, and the watermark of the
+# ingest step that fills each of them
+NORMALIZED_TABLES = [
+    ("article_keywords", "keywords"),
+    ("stats_rollups", "stats"),
+    ("article_peptides", "metadata"),
+    ("article_metadata_terms", "metadata"),
+    ("saved_search_matches", "saved_searches"),
+]
+
+# Date formats seen in the free-text article_info.date column, most specific first
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%B %d, %Y",
+    "%b %d, %Y",
+    "%Y %B %d",
+    "%Y %b %d",
+    "%m/%d/%Y",
+    "%B %Y",
+    "%b %Y",
+    "%Y %B",
+    "%Y %b",
+    "%B %d %Y",
+    "%b %d %Y",
+    "%Y-%m",
+    "%Y/%m",
+    "%Y",
+]
+
+# Version of parse_date_period(), kept in ingest_state. Bump it when the
+# parsing changes, and migrate() parses every date_epoch again.
+DATE_PARSER_VERSION = 2
+
+# Timestamps such as "2023-05-01T12:00:00Z" or "2023-05-01 10:00:00", read
+# by their leading date
+DATE_PREFIX_PATTERN = re.compile(r"^(\d{4})[-/](\d{1,2})[-/](\d{1,2})(?:[T ]|$)")
+
+YEAR_PATTERN = re.compile(r"\b(1[89]\d\d|20\d\d)\b")
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_date_period(text):
+    """
+    Parse a free-text publication date into the period it names.
+
+    Parameters
+    ----------
+    text : str
+        The date as stored in the article_info table, e.g. "2023-05-01",
+        "1 May 2023", "May 2023" or "2023 May 1".
+
+    Returns
+    -------
+    tuple or None
+        Unix timestamps at midnight UTC of the first day of the period and
+        of the first day of the next one: the next day, month or year
+        depending on how precise the text is. None if the text could not
+        be parsed.
+    """
+    if not text:
+        return None
+    text = " ".join(str(text).replace(".", " ").split())
+    for date_format in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+        start = calendar.timegm(parsed.timetuple())
+        if "%d" in date_format:
+            return start, start + 86400
+        if "%m" in date_format or "%b" in date_format or "%B" in date_format:
+            year, month = divmod(parsed.year * 12 + parsed.month, 12)
+            return start, calendar.timegm((year, month + 1, 1, 0, 0, 0))
+        return start, calendar.timegm((parsed.year + 1, 1, 1, 0, 0, 0))
+
+    match = DATE_PREFIX_PATTERN.match(text)
+    if match:
+        try:
+            start = calendar.timegm(datetime(*map(int, match.groups())).timetuple())
+        except ValueError:
+            pass
+        else:
+            return start, start + 86400
+
+    # Fall back to the year for anything else that contains one
+    match = YEAR_PATTERN.search(text)
+    if match:
+        year = int(match.group(1))
+        return calendar.timegm((year, 1, 1, 0, 0, 0)), calendar.timegm((year + 1, 1, 1, 0, 0, 0))
+    return None
+
+
+def parse_date(text):
+    """
+    Parse a free-text publication date into a Unix timestamp.
+
+    Parameters
+    ----------
+    text : str
+        The date as stored in the article_info table, e.g. "2023-05-01",
+        "1 May 2023", "May 2023" or "2023 May 1". Dates without a day or
+        month are mapped to the first day of the month or year.
+
+    Returns
+    -------
+    int or None
+        Seconds since the epoch at midnight UTC, or None if the text could
+        not be parsed.
+    """
+    period = parse_date_period(text)
+    return period[0] if period else None
+
+
+def parse_score(text):
+    """
+    Parse the score written by the model into a number.
+
+    Parameters
+    ----------
+    text : str or float
+        The score as stored in the model_responses table, e.g. "8", "8.5",
+        "8/10" or "Score: 8".
+
+    Returns
+    -------
+    float or None
+        The first number in the score, or None if there is none.
+    """
+    if text is None:
+        return None
+    match = NUMBER_PATTERN.search(str(text))
+    return float(match.group(0)) if match else None
+
+
+def column_names(conn, table):
+    """
+    Return the column names of a table.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    table : str
+        The name of the table.
+
+    Returns
+    -------
+    set
+        The names of the columns in the table.
+    """
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def backfill_dates(conn):
+    """
+    Fill in date_epoch for articles that do not have one yet.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+
+    Returns
+    -------
+    int
+        The number of articles whose date could be parsed.
+    """
+    rows = conn.execute(
+        """SELECT rowid, date FROM article_info
+           WHERE date_epoch IS NULL AND date IS NOT NULL"""
+    ).fetchall()
+    updates = [
+        (epoch, rowid)
+        for rowid, epoch in ((rowid, parse_date(date)) for rowid, date in rows)
+        if epoch is not None
+    ]
+    conn.executemany(
+        "UPDATE article_info SET date_epoch = ? WHERE rowid = ?", updates
+    )
+    return len(updates)
+
+
+def reset_dates(conn):
+    """
+    Clear date_epoch if it was parsed by an older version of parse_date().
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    """
+    row = conn.execute(
+        "SELECT last_rowid FROM ingest_state WHERE name = 'date_parser'"
+    ).fetchone()
+    if row is not None and row[0] == DATE_PARSER_VERSION:
+        return
+    # backfill_dates() then parses them all again
+    conn.execute("UPDATE article_info SET date_epoch = NULL WHERE date_epoch IS NOT NULL")
+    conn.execute(
+        "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES ('date_parser', ?)",
+        (DATE_PARSER_VERSION,),
+    )
+
+
+def backfill_scores(conn):
+    """
+    Fill in score_num for model responses that do not have one yet.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+
+    Returns
+    -------
+    int
+        The number of responses whose score could be parsed.
+    """
+    rows = conn.execute(
+        """SELECT rowid, score FROM model_responses
+           WHERE score_num IS NULL AND score IS NOT NULL"""
+    ).fetchall()
+    updates = [
+        (score, rowid)
+        for rowid, score in ((rowid, parse_score(score)) for rowid, score in rows)
+        if score is not None
+    ]
+    conn.executemany(
+        "UPDATE model_responses SET score_num = ? WHERE rowid = ?", updates
+    )
+    return len(updates)
+
+
+def reset_normalized_tables(conn):
+    """
+    Empty the tables built from normalized words if the normalization changed.
+
+    The version of keywords.normalize_keyword() the tables were built with
+    is kept in ingest_state. When it differs, the tables are emptied and
+    the watermarks of their ingest steps reset, so the next ingest rebuilds
+    them. Databases without a version were built before it was recorded.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    """
+    row = conn.execute(
+        "SELECT last_rowid FROM ingest_state WHERE name = 'normalization'"
+    ).fetchone()
+    if row is not None and row[0] == NORMALIZATION_VERSION:
+        return
+    for table, step in NORMALIZED_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute("DELETE FROM ingest_state WHERE name = ?", (step,))
+    conn.execute(
+        "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES ('normalization', ?)",
+        (NORMALIZATION_VERSION,),
+    )
+
+
+def migrate(conn):
+    """
+    Bring the articles database up to the schema expected by the API.
+
+    The migration is idempotent, so it is safe to run on every start. Besides
+    creating missing columns and indexes it backfills the derived columns of
+    any article added since the previous run, and empties the tables built
+    from normalized words when the normalization changed.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    """
+    with conn:
+        if "date_epoch" not in column_names(conn, "article_info"):
+            conn.execute("ALTER TABLE article_info ADD COLUMN date_epoch INTEGER")
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_article_info_date_epoch
+               ON article_info (date_epoch)"""
+        )
+        if "score_num" not in column_names(conn, "model_responses"):
+            conn.execute("ALTER TABLE model_responses ADD COLUMN score_num REAL")
+        # Covers the top-N by score query, so it never touches the table
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_model_responses_score_num
+               ON model_responses (score_num, doi)"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_article_info_doi ON article_info (doi)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_model_responses_doi ON model_responses (doi)"
+        )
+        # Precomputed nearest neighbours, filled by related.build_related()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS related (
+                   doi TEXT NOT NULL,
+                   rank INTEGER NOT NULL,
+                   related_doi TEXT NOT NULL,
+                   similarity REAL NOT NULL,
+                   PRIMARY KEY (doi, rank)
+               ) WITHOUT ROWID"""
+        )
+        # Highest article_info rowid processed by each step of ingest.py
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS ingest_state (
+                   name TEXT PRIMARY KEY,
+                   last_rowid INTEGER NOT NULL
+               )"""
+        )
+        # MinHash signatures and LSH buckets used by dedup.py
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS article_minhash (
+                   article_id INTEGER PRIMARY KEY,
+                   signature BLOB NOT NULL
+               )"""
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS minhash_buckets (
+                   band INTEGER NOT NULL,
+                   bucket INTEGER NOT NULL,
+                   article_id INTEGER NOT NULL,
+                   PRIMARY KEY (band, bucket, article_id)
+               ) WITHOUT ROWID"""
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS duplicates (
+                   article_id INTEGER PRIMARY KEY,
+                   duplicate_of INTEGER NOT NULL,
+                   similarity REAL NOT NULL
+               )"""
+        )
+        # Normalized DOI/PII/PMC/URL identifiers, filled by resolve.py
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS article_aliases (
+                   alias TEXT PRIMARY KEY,
+                   article_id INTEGER NOT NULL
+               ) WITHOUT ROWID"""
+        )
+        # Saved searches, their inverted index is built in memory from the
+        # terms, and the articles matched at ingest by saved_searches.py
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS saved_searches (
+                   id INTEGER PRIMARY KEY,
+                   name TEXT NOT NULL UNIQUE,
+                   term TEXT NOT NULL,
+                   min_score REAL
+               )"""
+        )
+        # sequence numbers the ingest runs that found each match, so the
+        # digest reads the matches it has not sent yet from the index below.
+        # Matches found when a search is added have sequence 0.
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS saved_search_matches (
+                   search_id INTEGER NOT NULL,
+                   article_id INTEGER NOT NULL,
+                   sequence INTEGER NOT NULL DEFAULT 0,
+                   PRIMARY KEY (search_id, article_id)
+               ) WITHOUT ROWID"""
+        )
+        if "sequence" not in column_names(conn, "saved_search_matches"):
+            conn.execute(
+                "ALTER TABLE saved_search_matches ADD COLUMN sequence INTEGER NOT NULL DEFAULT 0"
+            )
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_saved_search_matches_sequence
+               ON saved_search_matches (sequence)"""
+        )
+        # Article counts per month, score, journal and keyword, kept up to
+        # date at ingest by stats.py. value is untyped: text or an integer.
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS stats_rollups (
+                   dimension TEXT NOT NULL,
+                   value NOT NULL,
+                   articles INTEGER NOT NULL,
+                   PRIMARY KEY (dimension, value)
+               ) WITHOUT ROWID"""
+        )
+        # Top journals and keywords without scanning every value
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_stats_rollups_articles
+               ON stats_rollups (dimension, articles)"""
+        )
+        # Normalized keyword -> article index, filled by keywords.py. The
+        # primary key covers the lookups and counts of a keyword.
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS article_keywords (
+                   keyword TEXT NOT NULL,
+                   article_id INTEGER NOT NULL,
+                   PRIMARY KEY (keyword, article_id)
+               ) WITHOUT ROWID"""
+        )
+        # Peptide sequences, targets and methods parsed from the model
+        # metadata by metadata_fields.py, for exact and prefix lookups
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS article_peptides (
+                   sequence TEXT NOT NULL,
+                   article_id INTEGER NOT NULL,
+                   PRIMARY KEY (sequence, article_id)
+               ) WITHOUT ROWID"""
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS article_metadata_terms (
+                   field TEXT NOT NULL,
+                   value TEXT NOT NULL,
+                   article_id INTEGER NOT NULL,
+                   PRIMARY KEY (field, value, article_id)
+               ) WITHOUT ROWID"""
+        )
+        # Row of each article in the embedding matrix written by
+        # embeddings.py, and whether it was embedded with its summary
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS article_embeddings (
+                   article_id INTEGER PRIMARY KEY,
+                   row INTEGER NOT NULL,
+                   summarized INTEGER NOT NULL
+               )"""
+        )
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_article_embeddings_unsummarized
+               ON article_embeddings (row) WHERE summarized = 0"""
+        )
+        reset_normalized_tables(conn)
+        reset_dates(conn)
+        backfill_dates(conn)
+        backfill_scores(conn)
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else settings.db_path
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    conn.close()
@@ -1,18 +1,298 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+import json
+import math
+import os
+from typing import List
+
+from anyio import to_thread
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 import sqlite3
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+from admission import ConcurrencyLimiter, RateLimiter
+from cache import load_cache
+from embeddings import EmbeddingIndex, load_embedder
+import facets
+import ingest
+from keywords import normalize_keyword
+import migrations
+import resolve
+from settings import settings
+from singleflight import SingleFlight
+from snapshots import SnapshotReader
+import stats
+from suggest import TermIndex
+
+
+def prepare_database():
+    """
+    Add the derived columns, tables and indexes the queries below rely on.
+
+    Snapshots are published with them already in place, and under gunicorn
+    the master process runs this once before forking the workers. The Dash
+    app calls this itself when it uses the API in process.
+    """
+    if snapshot_reader is None and settings.ingest_on_startup:
+        conn = get_connection()
+        try:
+            ingest.process_new_articles(conn)
+        finally:
+            conn.close()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Endpoints run in this thread pool, so it bounds concurrent DB queries
+    to_thread.current_default_thread_limiter().total_tokens = settings.thread_pool_size
+    prepare_database()
+    # Build the /suggest/ index before the first request instead of in it
+    conn = get_connection()
+    try:
+        term_index.refresh(conn, force=True)
+    finally:
+        conn.close()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://127.0.0.1:8050"],  # Allow your Dash app's origin
+    allow_origins=settings.cors_origins,  # Allow your Dash app's origin
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
 )
 
+# When set, serve from the read-only snapshots published by snapshots.py
+snapshot_reader = (
+    SnapshotReader(
+        settings.snapshot_dir,
+        mmap_size=settings.sqlite_mmap_size,
+        check_interval=settings.snapshot_check_interval,
+    )
+    if settings.snapshot_dir
+    else None
+)
+
+# Concurrent identical lookups share one database query, see /metrics/
+flights = SingleFlight()
+
+# Results of /retrieve/ and /search/, shared between workers by the
+# configured backend
+response_cache = load_cache(
+    settings.cache_backend,
+    settings.db_path,
+    ttl=settings.cache_ttl,
+    max_local_entries=settings.cache_local_entries,
+    flight=flights,
+)
+
+# Admission control for the search endpoints, which can scan the whole
+# article table. The limits apply per worker process.
+search_rate_limiter = (
+    RateLimiter(settings.search_rate, settings.search_burst)
+    if settings.search_rate > 0
+    else None
+)
+search_slots = (
+    ConcurrencyLimiter(settings.search_max_concurrent, settings.search_queue_timeout)
+    if settings.search_max_concurrent > 0
+    else None
+)
+
+# Prefix index over keywords, journals and authors for /suggest/
+term_index = TermIndex(refresh_interval=settings.suggest_refresh_interval)
+
+# Embeddings of the article summaries for /search/semantic, in snapshot mode
+# the copy published with the current snapshot
+embedding_index = EmbeddingIndex(
+    snapshot_reader.current_path if snapshot_reader else settings.db_path,
+    load_embedder(settings.embedding_model),
+    refresh_interval=settings.embedding_refresh_interval,
+)
+
+
+def get_connection():
+    """
+    Open a connection to the articles database.
+
+    In snapshot mode the connection is a lock-free, read-only connection to
+    the latest published snapshot.
+
+    Returns
+    -------
+    sqlite3.Connection
+        A new connection to the articles database.
+    """
+    if snapshot_reader is not None:
+        conn = snapshot_reader.connect()
+    else:
+        conn = sqlite3.connect(settings.db_path)
+    conn.execute(f"PRAGMA cache_size = -{int(settings.sqlite_cache_kib)}")
+    return conn
+
+
+async def admit_search(request: Request):
+    """
+    Admit a search request, or reject it when the client or server is busy.
+
+    Each client has a token bucket, and at most search_max_concurrent
+    searches run at once, the others waiting up to search_queue_timeout
+    seconds for a slot. Behind a proxy, run uvicorn with --proxy-headers so
+    the client address is taken from X-Forwarded-For.
+
+    Parameters
+    ----------
+    request : Request
+        The incoming request.
+
+    Raises
+    ------
+    HTTPException
+        429 if the client is over its rate, 503 if no slot became free in
+        time, both with a Retry-After header.
+    """
+    if search_rate_limiter is not None:
+        client = request.client.host if request.client else ""
+        wait = search_rate_limiter.acquire(client)
+        if wait:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many searches, retry later.",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    if search_slots is None:
+        yield
+        return
+    if not await search_slots.acquire():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many searches in progress, retry later.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        yield
+    finally:
+        search_slots.release()
+
+
+def cached(name, arguments, compute):
+    """
+    Return the result of an endpoint from the response cache.
+
+    Concurrent requests with the same arguments share one computation, even
+    when the cache is disabled. In snapshot mode the key includes the
+    snapshot name, so publishing a new snapshot starts from an empty cache.
+
+    Parameters
+    ----------
+    name : str
+        The name of the endpoint.
+    arguments : list
+        The normalized, JSON-serializable arguments the result depends on.
+    compute : callable
+        Called without arguments to compute the result on a miss.
+
+    Returns
+    -------
+    object
+        The result, shared with other requests and not to be modified.
+    """
+    version = os.path.basename(snapshot_reader.current_path()) if snapshot_reader else ""
+    key = f"{name}:{version}:{json.dumps(arguments)}"
+    if response_cache is None:
+        return flights.do(name, key, compute)
+    return response_cache.get_or_compute(key, compute, name=name)
+
+
+def check_search_term(term):
+    """
+    Reject search terms short enough to match most of the articles.
+
+    Parameters
+    ----------
+    term : str
+        The search term given in the query string.
+
+    Raises
+    ------
+    HTTPException
+        If the term is shorter than search_min_term_length characters.
+    """
+    if len(term.strip()) < settings.search_min_term_length:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                "Search term must be at least "
+                f"{settings.search_min_term_length} characters."
+            ),
+        )
+
+
+def parse_date_param(value, name, end=False):
+    """
+    Parse a date query parameter into a Unix timestamp.
+
+    Parameters
+    ----------
+    value : str
+        The date given in the query string, e.g. "2023-05-01" or "2023".
+    name : str
+        The name of the query parameter, used in the error message.
+    end : bool, optional
+        Return the start of the next day, month or year instead, as an
+        exclusive upper bound, so "to=2023" takes in all of 2023.
+
+    Returns
+    -------
+    int or None
+        The timestamp, or None if no date was given.
+
+    Raises
+    ------
+    HTTPException
+        If the date cannot be parsed.
+    """
+    if value is None:
+        return None
+    period = migrations.parse_date_period(value)
+    if period is None:
+        raise HTTPException(status_code=400, detail=f"Invalid date for '{name}'.")
+    return period[1] if end else period[0]
+
+
+def select_fields(article_info, fields):
+    """
+    Keep only the requested fields of an article.
+
+    Parameters
+    ----------
+    article_info : dict
+        The article, as returned by retrieve_article().
+    fields : str
+        A comma separated list of field names, or None for every field.
+
+    Returns
+    -------
+    dict
+        The article with only the requested fields.
+
+    Raises
+    ------
+    HTTPException
+        If a requested field does not exist.
+    """
+    if not fields:
+        return article_info
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in article_info]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}.")
+    return {name: article_info[name] for name in names}
+
 
 def retrieve_article(doi=None, url=None, pii=None):
     """
@@ -35,13 +315,10 @@ def retrieve_article(doi=None, url=None, pii=None):
     if not doi and not url and not pii:
         return "No article identifier provided."
 
-    if url and not url.startswith("https://"):
-        if url.startswith("www."):
-            url = "https://" + url
-        else:
-            url = "https://www." + url
+    if url:
+        url = resolve.normalize_url(url)
 
-    conn = sqlite3.connect("../data/articles.db")
+    conn = get_connection()
     c = conn.cursor()
 
     if doi:
@@ -112,41 +389,145 @@ def retrieve_article(doi=None, url=None, pii=None):
 
 
 @app.get("/retrieve/")
-async def retrieve(doi: str = None, url: str = None, pii: str = None):
-    article_info = retrieve_article(doi=doi, url=url, pii=pii)
+def retrieve(doi: str = None, url: str = None, pii: str = None, fields: str = None):
+    # retrieve_article() looks up the normalized URL, so it is the key
+    identifiers = [doi, resolve.normalize_url(url) if url else url, pii]
+    article_info = cached(
+        "retrieve", identifiers, lambda: retrieve_article(doi=doi, url=url, pii=pii)
+    )
     if article_info in [
         "No article identifier provided.",
         "Article not found in database.",
     ]:
         raise HTTPException(status_code=404, detail=article_info)
-    return article_info
+    return select_fields(article_info, fields)
 
 
-@app.get("/search/")
-async def search_papers(term: str, sort: str = "new_to_old"):
-    conn = sqlite3.connect("../data/articles.db")
+@app.get("/resolve/")
+def resolve_identifier(q: str, fields: str = None):
+    kind, alias = resolve.classify(q)
+    if alias is None:
+        raise HTTPException(
+            status_code=404, detail="Input is not a DOI, URL, PII or PMC ID."
+        )
+
+    conn = get_connection()
     c = conn.cursor()
+    c.execute(
+        """SELECT article_info.doi FROM article_aliases
+           JOIN article_info ON article_info.rowid = article_aliases.article_id
+           WHERE article_aliases.alias = ?""",
+        (alias,),
+    )
+    result = c.fetchone()
+    conn.close()
 
-    # Determine the ORDER BY clause based on the sort parameter
+    if result:
+        article_info = cached(
+            "retrieve", [result[0], None, None], lambda: retrieve_article(doi=result[0])
+        )
+    elif kind in ("doi", "url", "pii"):
+        # Articles written since the last ingest have no aliases yet, the
+        # identifier is looked up directly as /retrieve/ does
+        identifiers = {"doi": None, "url": None, "pii": None}
+        identifiers[kind] = resolve.parse_identifier(q)[1]
+        article_info = cached(
+            "retrieve", list(identifiers.values()), lambda: retrieve_article(**identifiers)
+        )
+    else:
+        article_info = None
+    if not isinstance(article_info, dict):
+        raise HTTPException(
+            status_code=404, detail=f"No article found for {kind.upper()} '{q}'."
+        )
+    return select_fields(article_info, fields)
+
+
+def search_articles(
+    term,
+    date_from,
+    date_to,
+    min_score,
+    max_score,
+    include_duplicates,
+    journal,
+    publisher,
+    year,
+    score_band,
+    sort,
+    page,
+    page_size,
+    max_results=None,
+):
+    """
+    Search the articles of a SQLite database.
+
+    Parameters
+    ----------
+    term : str
+        The text searched for in the keywords and metadata.
+    date_from, date_to : int
+        Timestamps bounding the publication date, date_to excluded, or None.
+    min_score, max_score : float
+        Bounds of the score, or None.
+    include_duplicates : bool
+        Whether articles flagged as duplicates are included.
+    journal, publisher, year, score_band : list
+        Facet values the articles must have, or None.
+    sort : str
+        "new_to_old", "old_to_new" or "score".
+    page : int
+        The page of results to return, or None for every result.
+    page_size : int
+        The number of results per page.
+    max_results : int, optional
+        Without a page, stop after one result more than this, so callers
+        can tell the results were cut off.
+
+    Returns
+    -------
+    list
+        A dictionary with the title, DOI, date and score of each article.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+
+    # Determine the ORDER BY clause based on the sort parameter. The rowid
+    # tie-breaker keeps pages stable, as many articles share a score or date,
+    # and is part of the date index.
     if sort == "score":
-        order_by_clause = "model_responses.score DESC"
+        order_by_clause = "model_responses.score_num DESC, article_info.rowid DESC"
+    elif sort == "old_to_new":
+        order_by_clause = "article_info.date_epoch ASC, article_info.rowid ASC"
     else:
-        # Default to sorting by date
-        order_by_clause = "article_info.date DESC" if sort == "new_to_old" else "article_info.date ASC"
+        # Default to sorting from new to old
+        order_by_clause = "article_info.date_epoch DESC, article_info.rowid DESC"
 
+    where_clause, params = facets.build_filters(
+        term,
+        date_from,
+        date_to,
+        min_score,
+        max_score,
+        not include_duplicates,
+        journal=journal,
+        publisher=publisher,
+        year=year,
+        score_band=score_band,
+    )
     query = f"""SELECT article_info.title, article_info.doi, article_info.date, model_responses.score 
                 FROM article_info
                 LEFT JOIN model_responses ON article_info.doi = model_responses.doi
-                WHERE article_info.keywords LIKE '%' || ? || '%'
-                OR model_responses.metadata LIKE '%' || ? || '%'
+                WHERE {where_clause}
                 ORDER BY {order_by_clause}"""
-    c.execute(
-        query,
-        (
-            term,
-            term,
-        ),
-    )
+    if page is not None:
+        # Walks the date index and stops after the requested page
+        query += " LIMIT ? OFFSET ?"
+        params += [page_size, (page - 1) * page_size]
+    elif max_results is not None:
+        query += " LIMIT ?"
+        params.append(max_results + 1)
+    c.execute(query, params)
     results = c.fetchall()
     conn.close()
 
@@ -161,4 +542,596 @@ async def search_papers(term: str, sort: str = "new_to_old"):
             for result in results
         ]
     else:
-        return []
\ No newline at end of file
+        return []
+
+
+def count_articles(
+    term,
+    date_from,
+    date_to,
+    min_score,
+    max_score,
+    include_duplicates,
+    journal,
+    publisher,
+    year,
+    score_band,
+):
+    """
+    Count the articles matching a search, without returning them.
+
+    Parameters
+    ----------
+    term, date_from, date_to, min_score, max_score, include_duplicates,
+    journal, publisher, year, score_band
+        The filters, as for search_articles().
+
+    Returns
+    -------
+    int
+        The number of results search_articles() would return.
+    """
+    where_clause, params = facets.build_filters(
+        term,
+        date_from,
+        date_to,
+        min_score,
+        max_score,
+        not include_duplicates,
+        journal=journal,
+        publisher=publisher,
+        year=year,
+        score_band=score_band,
+    )
+    conn = get_connection()
+    try:
+        return conn.execute(
+            f"""SELECT COUNT(*) FROM article_info
+                LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+                WHERE {where_clause}""",
+            params,
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@app.get("/search/", dependencies=[Depends(admit_search)])
+def search_papers(
+    term: str,
+    sort: str = "new_to_old",
+    date_from: str = Query(None, alias="from"),
+    date_to: str = Query(None, alias="to"),
+    min_score: float = None,
+    max_score: float = None,
+    include_duplicates: bool = False,
+    journal: List[str] = Query(None),
+    publisher: List[str] = Query(None),
+    year: List[int] = Query(None),
+    score_band: List[int] = Query(None),
+    page: int = Query(None, ge=1),
+    page_size: int = Query(50, ge=1, le=1000),
+    count_only: bool = False,
+    response: Response = None,
+):
+    check_search_term(term)
+    filters = [
+        term,
+        parse_date_param(date_from, "from"),
+        parse_date_param(date_to, "to", end=True),
+        min_score,
+        max_score,
+        include_duplicates,
+        journal,
+        publisher,
+        year,
+        score_band,
+    ]
+    if count_only:
+        return cached("search_count", filters, lambda: {"count": count_articles(*filters)})
+
+    # Without a page, a term matching most of the table would return all of
+    # it, so such searches stop after search_max_results results
+    max_results = (settings.search_max_results or None) if page is None else None
+    arguments = filters + [sort, page, page_size, max_results]
+    results = cached("search", arguments, lambda: search_articles(*arguments))
+    if max_results is not None and len(results) > max_results:
+        response.headers["X-Result-Truncated"] = "true"
+        response.headers["X-Result-Limit"] = str(max_results)
+        return results[:max_results]
+    return results
+
+
+@app.get("/search/facets/", dependencies=[Depends(admit_search)])
+def search_facets(
+    term: str = None,
+    date_from: str = Query(None, alias="from"),
+    date_to: str = Query(None, alias="to"),
+    min_score: float = None,
+    max_score: float = None,
+    include_duplicates: bool = False,
+    journal: List[str] = Query(None),
+    publisher: List[str] = Query(None),
+    year: List[int] = Query(None),
+    score_band: List[int] = Query(None),
+):
+    if term is not None:
+        check_search_term(term)
+    date_from = parse_date_param(date_from, "from")
+    date_to = parse_date_param(date_to, "to", end=True)
+
+    conn = get_connection()
+    try:
+        return facets.facet_counts(
+            conn,
+            term,
+            date_from,
+            date_to,
+            min_score,
+            max_score,
+            not include_duplicates,
+            journal=journal,
+            publisher=publisher,
+            year=year,
+            score_band=score_band,
+        )
+    finally:
+        conn.close()
+
+
+@app.get("/search/semantic", dependencies=[Depends(admit_search)])
+def semantic_search(q: str, k: int = Query(10, ge=1, le=100)):
+    conn = get_connection()
+    try:
+        # Embeddings are written by the ingest step, this only reloads them
+        embedding_index.refresh()
+        # Results are shown by DOI, so an empty one cannot be linked
+        neighbors = [
+            (doi, similarity) for doi, similarity in embedding_index.search(q, k=k) if doi
+        ]
+
+        c = conn.cursor()
+        c.execute(
+            f"""SELECT article_info.doi, article_info.title, article_info.date,
+                       model_responses.score
+                FROM article_info
+                LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+                WHERE article_info.doi IN ({", ".join("?" for _ in neighbors)})""",
+            [doi for doi, _ in neighbors],
+        )
+        articles = {result[0]: result for result in c.fetchall()}
+    finally:
+        conn.close()
+
+    return [
+        {
+            "title": articles[doi][1],
+            "doi": doi,
+            "date": articles[doi][2],
+            "score": articles[doi][3],
+            "similarity": similarity,
+        }
+        for doi, similarity in neighbors
+        if doi in articles
+    ]
+
+
+@app.get("/related/{doi:path}")
+def related_articles(doi: str):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """SELECT article_info.title, related.related_doi, article_info.date,
+                  related.similarity
+           FROM related
+           JOIN article_info ON article_info.doi = related.related_doi
+           WHERE related.doi = ?
+           ORDER BY related.rank""",
+        (doi,),
+    )
+    results = c.fetchall()
+    conn.close()
+
+    return [
+        {
+            "title": result[0],
+            "doi": result[1],
+            "date": result[2],
+            "similarity": result[3],
+        }
+        for result in results
+    ]
+
+
+@app.get("/duplicates/")
+def duplicate_articles():
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """SELECT duplicate.title, duplicate.doi, duplicate.url,
+                  original.title, original.doi, original.url,
+                  duplicates.similarity
+           FROM duplicates
+           JOIN article_info AS duplicate ON duplicate.rowid = duplicates.article_id
+           JOIN article_info AS original ON original.rowid = duplicates.duplicate_of
+           ORDER BY duplicates.similarity DESC"""
+    )
+    results = c.fetchall()
+    conn.close()
+
+    return [
+        {
+            "title": result[0],
+            "doi": result[1],
+            "url": result[2],
+            "duplicate_of": {
+                "title": result[3],
+                "doi": result[4],
+                "url": result[5],
+            },
+            "similarity": result[6],
+        }
+        for result in results
+    ]
+
+
+@app.get("/top/")
+def top_articles(n: int = Query(10, ge=1, le=1000), by: str = "score"):
+    if by not in ("score", "date"):
+        raise HTTPException(status_code=400, detail="'by' must be 'score' or 'date'.")
+    conn = get_connection()
+    c = conn.cursor()
+
+    if by == "date":
+        # Walks idx_article_info_date_epoch from the newest article
+        c.execute(
+            """SELECT article_info.doi, model_responses.score_num FROM article_info
+               LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+               WHERE article_info.date_epoch IS NOT NULL
+               ORDER BY article_info.date_epoch DESC LIMIT ?""",
+            (n,),
+        )
+    else:
+        # Index-only scan of idx_model_responses_score_num
+        c.execute(
+            """SELECT doi, score_num FROM model_responses
+               WHERE score_num IS NOT NULL
+               ORDER BY score_num DESC LIMIT ?""",
+            (n,),
+        )
+    top = c.fetchall()
+
+    c.execute(
+        f"""SELECT doi, title, date FROM article_info
+            WHERE doi IN ({", ".join("?" for _ in top)})""",
+        [doi for doi, _ in top],
+    )
+    articles = {doi: (title, date) for doi, title, date in c.fetchall()}
+    conn.close()
+
+    return [
+        {
+            "title": articles[doi][0],
+            "doi": doi,
+            "date": articles[doi][1],
+            "score": score,
+        }
+        for doi, score in top
+        if doi in articles
+    ]
+
+
+def saved_search_summaries(latest):
+    """
+    List the saved searches with their most recent matches.
+
+    Parameters
+    ----------
+    latest : int
+        The number of matches returned per saved search.
+
+    Returns
+    -------
+    list
+        The name, term, minimum score and number of matches of each saved
+        search, and its latest matches, most recently ingested first.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """SELECT saved_searches.id, name, term, min_score, COUNT(saved_search_matches.article_id)
+           FROM saved_searches
+           LEFT JOIN saved_search_matches ON saved_search_matches.search_id = saved_searches.id
+           GROUP BY saved_searches.id
+           ORDER BY name"""
+    )
+    searches = {
+        search_id: {
+            "id": search_id,
+            "name": name,
+            "term": term,
+            "min_score": min_score,
+            "count": count,
+            "latest": [],
+        }
+        for search_id, name, term, min_score, count in c.fetchall()
+    }
+    # One query per search, each reading only its latest rows from the end of
+    # the (search_id, article_id) primary key
+    for search_id, search in searches.items():
+        c.execute(
+            """SELECT article_info.title, article_info.doi, article_info.date,
+                      model_responses.score
+               FROM (SELECT article_id FROM saved_search_matches
+                     WHERE search_id = ? ORDER BY article_id DESC LIMIT ?) AS latest
+               JOIN article_info ON article_info.rowid = latest.article_id
+               LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+               ORDER BY latest.article_id DESC""",
+            (search_id, latest),
+        )
+        search["latest"] = [
+            {"title": title, "doi": doi, "date": date, "score": score}
+            for title, doi, date, score in c.fetchall()
+        ]
+    conn.close()
+    return list(searches.values())
+
+
+@app.get("/saved_searches/")
+def saved_searches(latest: int = Query(5, ge=0, le=100)):
+    return cached("saved_searches", [latest], lambda: saved_search_summaries(latest))
+
+
+@app.get("/saved_searches/{search_id}/matches")
+def saved_search_matches(
+    search_id: int,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=1000),
+):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM saved_searches WHERE id = ?", (search_id,))
+    if c.fetchone() is None:
+        conn.close()
+        raise HTTPException(status_code=404, detail="Saved search not found.")
+    c.execute(
+        """SELECT article_info.title, article_info.doi, article_info.date, model_responses.score
+           FROM saved_search_matches
+           JOIN article_info ON article_info.rowid = saved_search_matches.article_id
+           LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+           WHERE saved_search_matches.search_id = ?
+           ORDER BY saved_search_matches.article_id DESC
+           LIMIT ? OFFSET ?""",
+        (search_id, page_size, (page - 1) * page_size),
+    )
+    results = c.fetchall()
+    conn.close()
+
+    return [
+        {"title": result[0], "doi": result[1], "date": result[2], "score": result[3]}
+        for result in results
+    ]
+
+
+def keyword_articles(keyword, page, page_size):
+    """
+    Page through the articles with a normalized keyword.
+
+    Both queries only read the primary key of article_keywords, the articles
+    of a page are then looked up by rowid.
+
+    Parameters
+    ----------
+    keyword : str
+        The normalized keyword.
+    page : int
+        The page of articles to return.
+    page_size : int
+        The number of articles per page.
+
+    Returns
+    -------
+    dict
+        The keyword, its number of articles and the title, DOI, date and
+        score of the articles of the page, most recently ingested first.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*) FROM article_keywords WHERE keyword = ?", (keyword,))
+    count = c.fetchone()[0]
+    c.execute(
+        """SELECT article_info.title, article_info.doi, article_info.date, model_responses.score
+           FROM (SELECT article_id FROM article_keywords WHERE keyword = ?
+                 ORDER BY article_id DESC LIMIT ? OFFSET ?) AS page
+           JOIN article_info ON article_info.rowid = page.article_id
+           LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+           ORDER BY page.article_id DESC""",
+        (keyword, page_size, (page - 1) * page_size),
+    )
+    results = c.fetchall()
+    conn.close()
+
+    return {
+        "keyword": keyword,
+        "count": count,
+        "articles": [
+            {"title": result[0], "doi": result[1], "date": result[2], "score": result[3]}
+            for result in results
+        ],
+    }
+
+
+@app.get("/keywords/{keyword:path}")
+def browse_keyword(
+    keyword: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=1000),
+):
+    # Exact match on the normalized keyword, "Stapled Peptides" finds
+    # "stapled peptide" but "peptide" does not find "peptidomimetic"
+    normalized = normalize_keyword(keyword)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="The keyword contains no words.")
+    arguments = [normalized, page, page_size]
+    return cached("keywords", arguments, lambda: keyword_articles(*arguments))
+
+
+def peptide_articles(low, high, page, page_size):
+    """
+    Page through the articles mentioning a peptide sequence in a range.
+
+    Both queries are range scans of the primary key of article_peptides.
+
+    Parameters
+    ----------
+    low : str
+        The lowest sequence, included.
+    high : str
+        The highest sequence, excluded.
+    page : int
+        The page of results to return.
+    page_size : int
+        The number of results per page.
+
+    Returns
+    -------
+    dict
+        The number of (sequence, article) pairs in the range, and the
+        sequence, title, DOI, date and score of those of the page, in
+        sequence order.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "SELECT COUNT(*) FROM article_peptides WHERE sequence >= ? AND sequence < ?",
+        (low, high),
+    )
+    count = c.fetchone()[0]
+    c.execute(
+        """SELECT page.sequence, article_info.title, article_info.doi, article_info.date,
+                  model_responses.score
+           FROM (SELECT sequence, article_id FROM article_peptides
+                 WHERE sequence >= ? AND sequence < ?
+                 ORDER BY sequence, article_id LIMIT ? OFFSET ?) AS page
+           JOIN article_info ON article_info.rowid = page.article_id
+           LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+           ORDER BY page.sequence, page.article_id""",
+        (low, high, page_size, (page - 1) * page_size),
+    )
+    results = c.fetchall()
+    conn.close()
+
+    return {
+        "count": count,
+        "articles": [
+            {
+                "sequence": result[0],
+                "title": result[1],
+                "doi": result[2],
+                "date": result[3],
+                "score": result[4],
+            }
+            for result in results
+        ],
+    }
+
+
+@app.get("/peptides/")
+def browse_peptides(
+    sequence: str = None,
+    prefix: str = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=1000),
+):
+    if (sequence is None) == (prefix is None):
+        raise HTTPException(
+            status_code=400, detail="Provide exactly one of 'sequence' or 'prefix'."
+        )
+    query = (sequence or prefix).strip().upper()
+    if not query.isalpha() or not query.isascii():
+        raise HTTPException(
+            status_code=400, detail="Sequences are written in the one-letter amino acid code."
+        )
+    # Sequences are uppercase letters, so the prefix range ends at the prefix
+    # with its last letter incremented, and an exact sequence range at the
+    # smallest string sorting after it
+    if prefix is not None:
+        low, high = query, query[:-1] + chr(ord(query[-1]) + 1)
+    else:
+        low, high = query, query + "\0"
+    arguments = [low, high, page, page_size]
+    return cached("peptides", arguments, lambda: peptide_articles(*arguments))
+
+
+@app.get("/metadata/{field}/{value:path}")
+def browse_metadata(
+    field: str,
+    value: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=1000),
+):
+    if field not in ("target", "method"):
+        raise HTTPException(status_code=400, detail="'field' must be 'target' or 'method'.")
+    normalized = normalize_keyword(value)
+    if not normalized:
+        raise HTTPException(status_code=400, detail=f"The {field} contains no words.")
+
+    def compute():
+        conn = get_connection()
+        c = conn.cursor()
+        c.execute(
+            "SELECT COUNT(*) FROM article_metadata_terms WHERE field = ? AND value = ?",
+            (field, normalized),
+        )
+        count = c.fetchone()[0]
+        c.execute(
+            """SELECT article_info.title, article_info.doi, article_info.date,
+                      model_responses.score
+               FROM (SELECT article_id FROM article_metadata_terms
+                     WHERE field = ? AND value = ?
+                     ORDER BY article_id DESC LIMIT ? OFFSET ?) AS page
+               JOIN article_info ON article_info.rowid = page.article_id
+               LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+               ORDER BY page.article_id DESC""",
+            (field, normalized, page_size, (page - 1) * page_size),
+        )
+        results = c.fetchall()
+        conn.close()
+        return {
+            "field": field,
+            "value": normalized,
+            "count": count,
+            "articles": [
+                {"title": result[0], "doi": result[1], "date": result[2], "score": result[3]}
+                for result in results
+            ],
+        }
+
+    return cached("metadata", [field, normalized, page, page_size], compute)
+
+
+@app.get("/stats/")
+def corpus_stats(top: int = Query(20, ge=1, le=100)):
+    def compute():
+        conn = get_connection()
+        try:
+            return stats.read_stats(conn, top)
+        finally:
+            conn.close()
+
+    return cached("stats", [top], compute)
+
+
+@app.get("/suggest/")
+def suggest(q: str, limit: int = Query(10, ge=1, le=50), field: str = None):
+    conn = get_connection()
+    try:
+        term_index.refresh(conn)
+    finally:
+        conn.close()
+    return term_index.complete(q, limit=limit, field=field)
+
+
+@app.get("/metrics/")
+def metrics():
+    # Counters of this worker process only
+    return {"single_flight": flights.stats()}
@@ -0,0 +1,169 @@
+import heapq
+import math
+import sqlite3
+import sys
+from collections import defaultdict
+
+import migrations
+from settings import settings
+from suggest import KEYWORD_SPLIT
+
+
+# Terms found in more articles than this are left out of the similarity.
+# The bound is a number of articles, not a fraction of the corpus, so every
+# article is compared with at most MAX_DOCUMENT_FREQUENCY others per term
+# and the job grows linearly with the corpus instead of quadratically.
+MAX_DOCUMENT_FREQUENCY = 1000
+
+
+def keyword_terms(keywords):
+    """
+    Split the keyword text of an article into lowercased terms.
+
+    Both the full keyword phrases and their individual words are returned,
+    so "stapled peptide" is related to "stapled peptides" through "stapled".
+
+    Parameters
+    ----------
+    keywords : str
+        The delimited keyword text of the article.
+
+    Returns
+    -------
+    set
+        The terms of the article.
+    """
+    terms = set()
+    for keyword in KEYWORD_SPLIT.split((keywords or "").lower()):
+        keyword = keyword.strip()
+        if keyword:
+            terms.add(keyword)
+            terms.update(keyword.split())
+    return terms
+
+
+def tfidf_vectors(documents):
+    """
+    Compute unit-length TF-IDF vectors for a list of term sets.
+
+    Parameters
+    ----------
+    documents : list
+        One set of terms per article.
+
+    Returns
+    -------
+    tuple
+        A list of sparse vectors as {term: weight} dictionaries, and a
+        dictionary with the document frequency of every term.
+    """
+    document_frequency = defaultdict(int)
+    for terms in documents:
+        for term in terms:
+            document_frequency[term] += 1
+
+    n = len(documents)
+    vectors = []
+    for terms in documents:
+        weights = {term: math.log(n / document_frequency[term]) + 1.0 for term in terms}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        vectors.append({term: weight / norm for term, weight in weights.items()})
+    return vectors, document_frequency
+
+
+def compute_related(documents, k=10):
+    """
+    Find the k most similar articles of every article.
+
+    Similarity is the cosine between TF-IDF keyword vectors. Instead of
+    comparing every pair, the dot products are accumulated over an inverted
+    index, skipping the terms of more than MAX_DOCUMENT_FREQUENCY articles.
+    Only articles sharing one of the remaining terms are compared, which
+    bounds the work to O(N * T * MAX_DOCUMENT_FREQUENCY) for N articles of
+    T terms. Common terms do not count towards the similarity, so it is an
+    approximation on large corpora.
+
+    Parameters
+    ----------
+    documents : list
+        One set of terms per article.
+    k : int, optional
+        The number of related articles to keep per article.
+
+    Returns
+    -------
+    list
+        For every article, a list of (index, similarity) tuples of its most
+        similar articles, most similar first.
+    """
+    vectors, document_frequency = tfidf_vectors(documents)
+
+    postings = defaultdict(list)
+    for i, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            if document_frequency[term] <= MAX_DOCUMENT_FREQUENCY:
+                postings[term].append((i, weight))
+
+    related = []
+    for i, vector in enumerate(vectors):
+        scores = defaultdict(float)
+        for term, weight in vector.items():
+            for j, other_weight in postings.get(term, ()):
+                if j != i:
+                    scores[j] += weight * other_weight
+        related.append(heapq.nlargest(k, scores.items(), key=lambda item: item[1]))
+    return related
+
+
+def build_related(conn, k=10):
+    """
+    Recompute the related table for every article in the database.
+
+    This is a full recompute rather than an update with the new articles,
+    as every article changes the document frequencies and so the weights of
+    all the others. It reads the whole corpus and is meant to run offline,
+    e.g. nightly; see compute_related() for its cost.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    k : int, optional
+        The number of related articles to store per article.
+
+    Returns
+    -------
+    int
+        The number of rows written to the related table.
+    """
+    c = conn.cursor()
+    c.execute(
+        """SELECT doi, keywords FROM article_info
+           WHERE doi IS NOT NULL GROUP BY doi"""
+    )
+    articles = c.fetchall()
+    dois = [doi for doi, _ in articles]
+    related = compute_related([keyword_terms(keywords) for _, keywords in articles], k)
+
+    rows = [
+        (dois[i], rank, dois[j], similarity)
+        for i, neighbors in enumerate(related)
+        for rank, (j, similarity) in enumerate(neighbors, start=1)
+    ]
+    with conn:
+        conn.execute("DELETE FROM related")
+        conn.executemany(
+            """INSERT INTO related (doi, rank, related_doi, similarity)
+               VALUES (?, ?, ?, ?)""",
+            rows,
+        )
+    return len(rows)
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else settings.db_path
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    conn = sqlite3.connect(db_path)
+    migrations.migrate(conn)
+    print(f"Stored {build_related(conn, k)} related articles")
+    conn.close()
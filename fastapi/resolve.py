@@ -0,0 +1,186 @@
+import re
+
+
+DOI_PATTERN = re.compile(r"(10\.\d{4,9}/\S+)", re.IGNORECASE)
+DOI_URL_PATTERN = re.compile(r"^(?:https?://)?(?:dx\.)?doi\.org/(10\..+)$", re.IGNORECASE)
+SCIDIR_PATTERN = re.compile(
+    r"sciencedirect\.com/science/article/(?:abs/)?pii/([A-Z0-9()\-]+)", re.IGNORECASE
+)
+PII_PATTERN = re.compile(r"^S[0-9X()\-]{15,}$", re.IGNORECASE)
+PMC_PATTERN = re.compile(r"(?:^|/)(PMC\d+)/?$", re.IGNORECASE)
+
+
+def normalize_url(url):
+    """
+    Complete a URL to the https://www. form stored in article_info.
+
+    Parameters
+    ----------
+    url : str
+        The URL, with or without scheme and www prefix.
+
+    Returns
+    -------
+    str
+        The URL starting with https://.
+    """
+    if not url.startswith("https://"):
+        if url.startswith("http://"):
+            url = url[len("http://") :]
+        if url.startswith("www."):
+            url = "https://" + url
+        else:
+            url = "https://www." + url
+    return url
+
+
+def normalize_pii(pii):
+    """
+    Strip the punctuation from a PII.
+
+    Parameters
+    ----------
+    pii : str
+        The PII, e.g. "S0022-2836(23)00123-4".
+
+    Returns
+    -------
+    str
+        The uppercased PII without punctuation, e.g. "S0022283623001234".
+    """
+    return re.sub(r"[^0-9A-Z]", "", pii.upper())
+
+
+def parse_identifier(query):
+    """
+    Work out which kind of identifier a user typed and extract it.
+
+    Parameters
+    ----------
+    query : str
+        A DOI (bare, "doi:" prefixed or as a doi.org URL), a ScienceDirect
+        URL, a bare PII, a PMC id or PMC URL, or any other article URL.
+
+    Returns
+    -------
+    tuple
+        The identifier kind ("doi", "pii", "pmc" or "url") and the
+        identifier in the form stored in article_info: the DOI as typed, the
+        PII without punctuation, the uppercased PMC id or the normalized
+        URL. (None, None) if the query is not an identifier.
+    """
+    query = query.strip()
+    if not query:
+        return None, None
+
+    match = DOI_URL_PATTERN.match(query)
+    if match:
+        return "doi", match.group(1)
+    if query.lower().startswith("doi:"):
+        query = query[len("doi:") :].strip()
+    if query.startswith("10."):
+        match = DOI_PATTERN.match(query)
+        if match:
+            return "doi", match.group(1)
+
+    match = SCIDIR_PATTERN.search(query)
+    if match:
+        return "pii", normalize_pii(match.group(1))
+    if PII_PATTERN.match(query):
+        return "pii", normalize_pii(query)
+
+    match = PMC_PATTERN.search(query)
+    if match:
+        return "pmc", match.group(1).upper()
+
+    if "." in query and " " not in query:
+        return "url", normalize_url(query)
+    return None, None
+
+
+def classify(query):
+    """
+    Work out which kind of identifier a user typed and normalize it.
+
+    Parameters
+    ----------
+    query : str
+        Any identifier accepted by parse_identifier().
+
+    Returns
+    -------
+    tuple
+        The identifier kind ("doi", "pii", "pmc" or "url") and the alias
+        used to look it up in the article_aliases table, or (None, None) if
+        the query is not an identifier.
+    """
+    kind, identifier = parse_identifier(query)
+    if kind is None:
+        return None, None
+    # DOIs are case-insensitive
+    return kind, f"{kind}:{identifier.lower() if kind == 'doi' else identifier}"
+
+
+def article_aliases(doi, url, pmc_id):
+    """
+    Return every alias an article can be looked up by.
+
+    Parameters
+    ----------
+    doi : str
+        The DOI of the article.
+    url : str
+        The URL of the article.
+    pmc_id : str
+        The PubMed Central id of the article.
+
+    Returns
+    -------
+    set
+        The aliases, in the format returned by classify().
+    """
+    aliases = set()
+    for identifier in (doi, url, pmc_id):
+        if identifier:
+            kind, alias = classify(str(identifier))
+            if alias:
+                aliases.add(alias)
+    if url:
+        # The stored URL is also reachable as typed, not only via its PII
+        aliases.add("url:" + normalize_url(url))
+    return aliases
+
+
+def index_articles(conn, since_rowid):
+    """
+    Add the aliases of the articles added since the last run.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_rowid : int
+        The highest article_info rowid that was already processed.
+
+    Returns
+    -------
+    int or None
+        The highest rowid processed, or None if there were no new articles.
+    """
+    c = conn.cursor()
+    c.execute(
+        """SELECT rowid, doi, url, pmc_id FROM article_info
+           WHERE rowid > ? ORDER BY rowid""",
+        (since_rowid,),
+    )
+    rows = c.fetchall()
+    # The first article with an alias keeps it, later duplicates do not
+    c.executemany(
+        "INSERT OR IGNORE INTO article_aliases (alias, article_id) VALUES (?, ?)",
+        [
+            (alias, rowid)
+            for rowid, doi, url, pmc_id in rows
+            for alias in article_aliases(doi, url, pmc_id)
+        ],
+    )
+    return rows[-1][0] if rows else None
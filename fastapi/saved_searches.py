@@ -0,0 +1,330 @@
+import argparse
+import re
+import sqlite3
+from collections import defaultdict
+
+from keywords import lemma
+import migrations
+from settings import settings
+
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Name of the matching step in ingest.STEPS, and of its watermark
+STEP_NAME = "saved_searches"
+
+
+def tokens(text):
+    """
+    Split text into the tokens saved searches are matched on.
+
+    Tokens are lowercased singular words, as in normalized keywords, so
+    "stapled peptide" matches "stapled peptides".
+
+    Parameters
+    ----------
+    text : str
+        The text to split.
+
+    Returns
+    -------
+    set
+        The tokens of the text.
+    """
+    return {lemma(word) for word in WORD_PATTERN.findall((text or "").lower())}
+
+
+def load_index(conn, search_ids=None):
+    """
+    Load the inverted index of the saved searches.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    search_ids : list, optional
+        Only load these saved searches.
+
+    Returns
+    -------
+    tuple
+        A dictionary from each token to the ids of the saved searches
+        containing it, and a dictionary from each saved search id to its
+        number of tokens and minimum score.
+    """
+    query = "SELECT id, term, min_score FROM saved_searches"
+    params = []
+    if search_ids is not None:
+        query += f" WHERE id IN ({', '.join('?' for _ in search_ids)})"
+        params = list(search_ids)
+    postings = defaultdict(list)
+    searches = {}
+    for search_id, term, min_score in conn.execute(query, params):
+        search_tokens = tokens(term)
+        searches[search_id] = (len(search_tokens), min_score)
+        for token in search_tokens:
+            postings[token].append(search_id)
+    return postings, searches
+
+
+# Name of the watermark on the model_responses rowid, which catches the
+# responses written after their article was matched
+RESPONSES_WATERMARK = "saved_searches_responses"
+
+# Name of the counter the match sequence numbers are taken from. It lives in
+# ingest_state rather than being read from saved_search_matches, whose rows
+# are deleted with their search or by a rebuild, so numbers are never reused
+# below the digest watermark.
+SEQUENCE_COUNTER = "saved_searches_sequence"
+
+ARTICLE_QUERY = """SELECT article_info.rowid, article_info.keywords, model_responses.metadata,
+                          model_responses.score_num, duplicates.article_id IS NOT NULL
+                   FROM article_info
+                   LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+                   LEFT JOIN duplicates ON duplicates.article_id = article_info.rowid"""
+
+
+def match_rows(conn, rows, sequence=0, search_ids=None):
+    """
+    Record the saved searches matched by some articles.
+
+    Each article is matched against every saved search in one pass over the
+    tokens of its keywords and metadata: the inverted index gives the
+    searches containing each token, and a search matches when all of its
+    tokens were seen and the article reaches its minimum score. Articles
+    flagged as duplicates are skipped.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    rows : list
+        The articles, as read by ARTICLE_QUERY.
+    sequence : int, optional
+        The sequence number stored with the new matches.
+    search_ids : list, optional
+        Only match these saved searches.
+    """
+    postings, searches = load_index(conn, search_ids)
+    matches = []
+    for rowid, keywords, metadata, score, is_duplicate in rows:
+        if is_duplicate:
+            continue
+        hits = defaultdict(int)
+        for token in tokens(keywords) | tokens(metadata):
+            for search_id in postings.get(token, ()):
+                hits[search_id] += 1
+        for search_id, count in hits.items():
+            token_count, min_score = searches[search_id]
+            if count == token_count and (
+                min_score is None or (score is not None and score >= min_score)
+            ):
+                matches.append((search_id, rowid, sequence))
+    # Articles matched before keep their sequence, so they are not sent twice
+    conn.executemany(
+        """INSERT OR IGNORE INTO saved_search_matches (search_id, article_id, sequence)
+           VALUES (?, ?, ?)""",
+        matches,
+    )
+
+
+def match_articles(conn, since_rowid, until_rowid=None, search_ids=None, sequence=0):
+    """
+    Record the saved searches matched by a range of articles.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_rowid : int
+        Match the articles with a higher article_info rowid.
+    until_rowid : int, optional
+        Match the articles up to this rowid.
+    search_ids : list, optional
+        Only match these saved searches.
+    sequence : int, optional
+        The sequence number stored with the new matches.
+
+    Returns
+    -------
+    int or None
+        The highest rowid processed, or None if there were no articles.
+    """
+    query = ARTICLE_QUERY + " WHERE article_info.rowid > ?"
+    params = [since_rowid]
+    if until_rowid is not None:
+        query += " AND article_info.rowid <= ?"
+        params.append(until_rowid)
+    rows = conn.execute(query + " ORDER BY article_info.rowid", params).fetchall()
+    match_rows(conn, rows, sequence, search_ids)
+    return rows[-1][0] if rows else None
+
+
+def next_sequence(conn):
+    """
+    Take the next match sequence number.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+
+    Returns
+    -------
+    int
+        A number higher than any handed out before.
+    """
+    row = conn.execute(
+        "SELECT last_rowid FROM ingest_state WHERE name = ?", (SEQUENCE_COUNTER,)
+    ).fetchone()
+    if row is None:
+        # Databases matched before the counter existed
+        row = conn.execute(
+            "SELECT COALESCE(MAX(sequence), 0) FROM saved_search_matches"
+        ).fetchone()
+    sequence = row[0] + 1
+    conn.execute(
+        "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES (?, ?)",
+        (SEQUENCE_COUNTER, sequence),
+    )
+    return sequence
+
+
+def index_articles(conn, since_rowid):
+    """
+    Match the articles added since the last run against the saved searches.
+
+    The model response of an article can be written after the article was
+    matched, and its score and metadata change the matches. Articles whose
+    response is newer than the previous run are matched again, found from a
+    second watermark on the model_responses rowid.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_rowid : int
+        The highest article_info rowid that was already processed.
+
+    Returns
+    -------
+    int or None
+        The highest rowid processed, or None if there were no new articles.
+    """
+    if since_rowid == 0:
+        # A full rebuild, as after migrations.reset_normalized_tables(), finds
+        # the matches already sent: they are stored like those of a new search
+        sequence = 0
+    else:
+        sequence = next_sequence(conn)
+    last_rowid = match_articles(conn, since_rowid, sequence=sequence)
+
+    row = conn.execute(
+        "SELECT last_rowid FROM ingest_state WHERE name = ?", (RESPONSES_WATERMARK,)
+    ).fetchone()
+    since_response = row[0] if row else 0
+    (until_response,) = conn.execute("SELECT MAX(rowid) FROM model_responses").fetchone()
+    if until_response is not None and until_response > since_response:
+        # The articles above since_rowid were just matched with their response
+        rows = conn.execute(
+            ARTICLE_QUERY
+            + """ WHERE model_responses.rowid > ? AND model_responses.rowid <= ?
+                    AND article_info.rowid <= ?""",
+            (since_response, until_response, since_rowid),
+        ).fetchall()
+        match_rows(conn, rows, sequence)
+        conn.execute(
+            "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES (?, ?)",
+            (RESPONSES_WATERMARK, until_response),
+        )
+    return last_rowid
+
+
+def add_saved_search(conn, name, term, min_score=None):
+    """
+    Save a search, and match it against the articles already ingested.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    name : str
+        A unique name for the search.
+    term : str
+        The words an article must all contain in its keywords or metadata.
+    min_score : float, optional
+        The minimum score of a matching article.
+
+    Returns
+    -------
+    int
+        The id of the saved search.
+    """
+    if not tokens(term):
+        raise ValueError(f"The term of saved search {name} contains no words")
+    with conn:
+        search_id = conn.execute(
+            "INSERT INTO saved_searches (name, term, min_score) VALUES (?, ?, ?)",
+            (name, term, min_score),
+        ).lastrowid
+        # Later articles are matched by the ingest step
+        row = conn.execute(
+            "SELECT last_rowid FROM ingest_state WHERE name = ?", (STEP_NAME,)
+        ).fetchone()
+        if row is not None:
+            match_articles(conn, 0, row[0], search_ids=[search_id])
+    return search_id
+
+
+def remove_saved_search(conn, name):
+    """
+    Delete a saved search and its matches.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    name : str
+        The name of the search.
+
+    Returns
+    -------
+    bool
+        True if the search existed.
+    """
+    with conn:
+        row = conn.execute("SELECT id FROM saved_searches WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return False
+        conn.execute("DELETE FROM saved_search_matches WHERE search_id = ?", row)
+        conn.execute("DELETE FROM saved_searches WHERE id = ?", row)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the saved searches.")
+    parser.add_argument("--db-path", default=settings.db_path)
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add")
+    add.add_argument("name")
+    add.add_argument("term")
+    add.add_argument("--min-score", type=float)
+    remove = commands.add_parser("remove")
+    remove.add_argument("name")
+    commands.add_parser("list")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path)
+    migrations.migrate(conn)
+    if args.command == "add":
+        add_saved_search(conn, args.name, args.term, args.min_score)
+    elif args.command == "remove" and not remove_saved_search(conn, args.name):
+        parser.exit(1, f"No saved search named {args.name}\n")
+    for row in conn.execute(
+        """SELECT name, term, min_score, COUNT(saved_search_matches.article_id)
+           FROM saved_searches
+           LEFT JOIN saved_search_matches ON saved_search_matches.search_id = saved_searches.id
+           GROUP BY saved_searches.id ORDER BY name"""
+    ):
+        print(*row, sep="\t")
+    conn.close()
@@ -0,0 +1,116 @@
+import json
+import os
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default value of every setting. Each one can be overridden in the JSON file
+# named by PEPTIDE_DIGEST_SETTINGS, and then by a PEPTIDE_DIGEST_<NAME>
+# environment variable, e.g. PEPTIDE_DIGEST_DB_PATH=/srv/data/articles.db.
+DEFAULTS = {
+    # Live database, and the directory snapshots are served from when set.
+    # Workers check for a new snapshot every snapshot_check_interval seconds.
+    "db_path": os.path.join(BASE_DIR, "data", "articles.db"),
+    "snapshot_dir": "",
+    "snapshot_check_interval": 1.0,
+    # Per-connection SQLite page cache (KiB) and memory-mapped I/O (bytes)
+    "sqlite_cache_kib": 65536,
+    "sqlite_mmap_size": 1 << 30,
+    # Threads available to each worker for blocking database calls
+    "thread_pool_size": 40,
+    # Response cache: "none", "local" (per worker), "sqlite[:<path>]" (shared
+    # by the workers on the host) or a redis:// URL, behind a per-worker level
+    "cache_backend": "local",
+    "cache_ttl": 30.0,
+    "cache_local_entries": 1024,
+    # Admission control for the search endpoints, per worker: each client
+    # can run search_rate searches per second with bursts of search_burst,
+    # and at most search_max_concurrent searches run at once, the others
+    # waiting up to search_queue_timeout seconds. 0 disables a limit.
+    "search_rate": 5.0,
+    "search_burst": 20,
+    "search_max_concurrent": 8,
+    "search_queue_timeout": 2.0,
+    # Query cost guard: shorter search terms are rejected, and searches
+    # without a page return at most search_max_results results (0: no cap)
+    "search_min_term_length": 3,
+    "search_max_results": 1000,
+    # Digests of the new matches of the saved searches, written by digest.py
+    "digest_dir": os.path.join(BASE_DIR, "data", "digests"),
+    "digest_formats": ["md", "html", "json"],
+    # In-memory indexes
+    "embedding_model": "hashing",
+    "suggest_refresh_interval": 30.0,
+    "embedding_refresh_interval": 60.0,
+    # Server. Workers are CPU-bound on SQLite and JSON encoding, so more
+    # workers than cores only adds contention (see the README benchmarks).
+    "bind": "127.0.0.1:8000",
+    "workers": os.cpu_count() or 1,
+    "ingest_on_startup": True,
+    "cors_origins": ["http://127.0.0.1:8050"],
+}
+
+
+def parse_value(text, default):
+    """
+    Convert a setting given as text to the type of its default value.
+
+    Parameters
+    ----------
+    text : str
+        The value as given in the environment.
+    default : object
+        The default value of the setting.
+
+    Returns
+    -------
+    object
+        The converted value.
+    """
+    if isinstance(default, bool):
+        return text.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(text)
+    if isinstance(default, float):
+        return float(text)
+    if isinstance(default, list):
+        return [item.strip() for item in text.split(",") if item.strip()]
+    return text
+
+
+class Settings:
+    """
+    Settings of the API, read once at import time.
+
+    Parameters
+    ----------
+    environ : dict, optional
+        The environment to read overrides from, defaults to os.environ.
+    """
+
+    def __init__(self, environ=None):
+        environ = os.environ if environ is None else environ
+        values = dict(DEFAULTS)
+
+        settings_file = environ.get("PEPTIDE_DIGEST_SETTINGS")
+        if settings_file:
+            with open(settings_file) as f:
+                overrides = json.load(f)
+            unknown = set(overrides) - set(DEFAULTS)
+            if unknown:
+                raise ValueError(f"Unknown settings in {settings_file}: {sorted(unknown)}")
+            values.update(overrides)
+
+        for name, default in DEFAULTS.items():
+            variable = f"PEPTIDE_DIGEST_{name.upper()}"
+            if variable in environ:
+                values[name] = parse_value(environ[variable], default)
+
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"Settings({vars(self)})"
+
+
+settings = Settings()
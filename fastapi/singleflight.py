@@ -0,0 +1,92 @@
+import threading
+from collections import defaultdict
+
+
+class _Call:
+    """
+    A call in flight, shared by the thread running it and the ones waiting.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one.
+
+    The first thread calling ``do`` with a key runs the function. Threads
+    calling it with the same key before it returns wait and get the same
+    result, or the same exception. Nothing is kept once the call returns,
+    so this is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = defaultdict(lambda: {"calls": 0, "executions": 0, "coalesced": 0})
+
+    def do(self, name, key, function):
+        """
+        Run a function, or wait for the identical call already running.
+
+        Parameters
+        ----------
+        name : str
+            The kind of call, e.g. the endpoint name, used for the counters.
+        key : str
+            Identifies the call within ``name``.
+        function : callable
+            Called without arguments if no identical call is running.
+
+        Returns
+        -------
+        object
+            The result of the function, shared with the coalesced callers.
+        """
+        with self._lock:
+            call = self._calls.get((name, key))
+            leader = call is None
+            if leader:
+                call = self._calls[(name, key)] = _Call()
+            counters = self._counters[name]
+            counters["calls"] += 1
+            counters["executions" if leader else "coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[(name, key)]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """
+        Return the counters of every kind of call.
+
+        Returns
+        -------
+        dict
+            For each name, the number of calls, of calls that ran the
+            function and of calls that waited for an identical one, and the
+            number of calls currently in flight.
+        """
+        with self._lock:
+            stats = {
+                name: dict(counters, in_flight=0) for name, counters in self._counters.items()
+            }
+            for name, _ in self._calls:
+                stats[name]["in_flight"] += 1
+            return stats
@@ -0,0 +1,196 @@
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+import embeddings
+import ingest
+from settings import BASE_DIR, settings
+
+
+# Name of the file holding the name of the current snapshot
+POINTER_FILE = "CURRENT"
+
+# Superseded snapshots are kept for this many reader check intervals. Readers
+# move to a new snapshot within one interval, the rest is for the requests
+# still running on the old one (60 seconds by default, the gunicorn timeout).
+RETENTION_CHECK_INTERVALS = 60
+
+
+def copy_embeddings(db_path, snapshot_path):
+    """
+    Copy the embedding files of the live database next to a snapshot.
+
+    The writer appends to and rewrites its embedding files in place, so
+    readers of a snapshot search their own copy. The copied metadata is the
+    one read before the other files, so it never covers rows they lack.
+
+    Parameters
+    ----------
+    db_path : str
+        The path of the live articles database.
+    snapshot_path : str
+        The path of the snapshot.
+    """
+    source = embeddings.index_paths(db_path)
+    target = embeddings.index_paths(snapshot_path)
+    meta = embeddings.read_meta(source)
+    if meta is None:
+        return
+    for name in ("matrix", "dois", "ann"):
+        if os.path.exists(source[name]):
+            shutil.copyfile(source[name], target[name] + ".tmp")
+            os.replace(target[name] + ".tmp", target[name])
+    embeddings.write_meta(target, meta)
+
+
+def remove_snapshot(path):
+    """
+    Delete a snapshot and its embedding files.
+
+    Parameters
+    ----------
+    path : str
+        The path of the snapshot.
+    """
+    for file_path in [path, *embeddings.index_paths(path).values()]:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def publish_snapshot(db_path, snapshot_dir, min_age=None):
+    """
+    Publish a read-only, vacuumed copy of the articles database.
+
+    The snapshot is written under a temporary name and renamed into place,
+    then the pointer file is atomically replaced, so readers only ever see
+    complete snapshots. The embedding files are published with the
+    snapshot. Older snapshots are removed once they have been
+    superseded for ``min_age`` seconds, so workers that have not seen the
+    new pointer yet, or are still finishing requests, can keep reading them
+    however often snapshots are published.
+
+    Parameters
+    ----------
+    db_path : str
+        The path of the live articles database.
+    snapshot_dir : str
+        The directory the snapshots are published to.
+    min_age : float, optional
+        The number of seconds a superseded snapshot is kept, by default
+        RETENTION_CHECK_INTERVALS times settings.snapshot_check_interval.
+
+    Returns
+    -------
+    str
+        The path of the new snapshot.
+    """
+    if min_age is None:
+        min_age = RETENTION_CHECK_INTERVALS * settings.snapshot_check_interval
+    os.makedirs(snapshot_dir, exist_ok=True)
+    name = f"articles-{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 10**9:09d}.db"
+    path = os.path.join(snapshot_dir, name)
+    temporary_path = path + ".tmp"
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # Snapshots are read-only, so all derived data must be built first
+        ingest.process_new_articles(conn)
+        conn.execute("VACUUM INTO ?", (temporary_path,))
+    finally:
+        conn.close()
+    os.replace(temporary_path, path)
+    copy_embeddings(db_path, path)
+
+    pointer_path = os.path.join(snapshot_dir, POINTER_FILE)
+    with open(pointer_path + ".tmp", "w") as f:
+        f.write(name)
+    os.replace(pointer_path + ".tmp", pointer_path)
+
+    snapshots = sorted(
+        entry
+        for entry in os.listdir(snapshot_dir)
+        if entry.startswith("articles-") and entry.endswith(".db")
+    )
+    now = time.time()
+    for old, newer in zip(snapshots, snapshots[1:]):
+        # A snapshot was superseded when the next one was published
+        superseded = os.path.getmtime(os.path.join(snapshot_dir, newer))
+        if now - superseded >= min_age:
+            remove_snapshot(os.path.join(snapshot_dir, old))
+    return path
+
+
+class SnapshotReader:
+    """
+    Open connections to the latest published snapshot.
+
+    Connections use ``immutable=1``, so SQLite takes no locks and does not
+    check for changes, and a large ``mmap_size``, so every worker reads the
+    same pages from the OS page cache. When a new snapshot is published, new
+    connections open it while requests in flight finish on the old one.
+
+    Parameters
+    ----------
+    snapshot_dir : str
+        The directory the snapshots are published to.
+    mmap_size : int, optional
+        The number of bytes of the database to memory-map.
+    check_interval : float, optional
+        The minimum number of seconds between two checks for a new snapshot.
+    """
+
+    def __init__(self, snapshot_dir, mmap_size=1 << 30, check_interval=1.0):
+        self.snapshot_dir = snapshot_dir
+        self.mmap_size = mmap_size
+        self.check_interval = check_interval
+        self._path = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def current_path(self):
+        """
+        Return the path of the current snapshot.
+
+        Returns
+        -------
+        str
+            The path of the snapshot named in the pointer file.
+
+        Raises
+        ------
+        FileNotFoundError
+            If no snapshot has been published yet.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._path is None or now - self._last_check >= self.check_interval:
+                with open(os.path.join(self.snapshot_dir, POINTER_FILE)) as f:
+                    self._path = os.path.join(self.snapshot_dir, f.read().strip())
+                self._last_check = now
+            return self._path
+
+    def connect(self):
+        """
+        Open a read-only connection to the current snapshot.
+
+        Returns
+        -------
+        sqlite3.Connection
+            A connection to the current snapshot.
+        """
+        uri = f"file:{quote(os.path.abspath(self.current_path()))}?mode=ro&immutable=1"
+        conn = sqlite3.connect(uri, uri=True)
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        return conn
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else settings.db_path
+    snapshot_dir = sys.argv[2] if len(sys.argv) > 2 else (
+        settings.snapshot_dir or os.path.join(BASE_DIR, "data", "snapshots")
+    )
+    print(f"Published {publish_snapshot(db_path, snapshot_dir)}")
@@ -0,0 +1,227 @@
+import argparse
+import sqlite3
+import time
+from collections import Counter
+
+from keywords import keyword_list
+import migrations
+from settings import settings
+
+
+# Name of the rollup step in ingest.STEPS, and of its watermark
+STEP_NAME = "stats"
+
+# Name of the watermark on the model_responses rowid, which catches the
+# scores written after their article was counted
+RESPONSES_WATERMARK = "stats_responses"
+
+# Version of the rollups, kept in ingest_state. Bump it when article_values()
+# or migrations.parse_date_period() changes, and the next ingest recomputes
+# the rollups.
+ROLLUP_VERSION = 3
+
+# Periods of at most this many seconds count towards their month
+MONTH_SECONDS = 31 * 86400
+
+
+def article_values(date, score, journal, keywords):
+    """
+    Return the rollup values an article counts towards.
+
+    Parameters
+    ----------
+    date : str
+        The free-text publication date of the article, or None.
+    score : float
+        The score of the article, or None.
+    journal : str
+        The journal of the article, or None.
+    keywords : str
+        The delimited keyword text of the article.
+
+    Returns
+    -------
+    list
+        (dimension, value) pairs. Months are "YYYY-MM", only for dates that
+        name a day or a month, as a bare year would all be counted in
+        January. Scores are rounded down to an integer and keywords are
+        normalized as in article_keywords.
+    """
+    values = []
+    period = migrations.parse_date_period(date)
+    if period is not None and period[1] - period[0] <= MONTH_SECONDS:
+        values.append(("month", time.strftime("%Y-%m", time.gmtime(period[0]))))
+    if score is not None:
+        values.append(("score", int(score)))
+    if journal:
+        values.append(("journal", journal))
+    values.extend(("keyword", keyword) for keyword in keyword_list(keywords))
+    return values
+
+
+def add_counts(conn, counts):
+    """
+    Add article counts to the rollups.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    counts : collections.Counter
+        The number of articles per (dimension, value) pair.
+    """
+    conn.executemany(
+        """INSERT INTO stats_rollups (dimension, value, articles) VALUES (?, ?, ?)
+           ON CONFLICT (dimension, value) DO UPDATE SET articles = articles + excluded.articles""",
+        [(dimension, value, count) for (dimension, value), count in counts.items()],
+    )
+
+
+def index_articles(conn, since_rowid):
+    """
+    Add the articles added since the last run to the rollups.
+
+    Articles flagged as duplicates are not counted. The score of an article
+    whose model response is written after the article was counted is added
+    when the response is ingested, found from a second watermark on the
+    model_responses rowid. The rollups are recomputed when ROLLUP_VERSION
+    changed.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    since_rowid : int
+        The highest article_info rowid that was already processed.
+
+    Returns
+    -------
+    int or None
+        The highest rowid processed, or None if there were no new articles.
+    """
+    c = conn.cursor()
+    row = c.execute(
+        "SELECT last_rowid FROM ingest_state WHERE name = 'stats_version'"
+    ).fetchone()
+    if row is None or row[0] != ROLLUP_VERSION:
+        c.execute("DELETE FROM stats_rollups")
+        c.execute(
+            "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES ('stats_version', ?)",
+            (ROLLUP_VERSION,),
+        )
+        since_rowid = 0
+
+    c.execute(
+        """SELECT article_info.rowid, article_info.date, model_responses.score_num,
+                  article_info.journal, article_info.keywords,
+                  duplicates.article_id IS NOT NULL
+           FROM article_info
+           LEFT JOIN model_responses ON article_info.doi = model_responses.doi
+           LEFT JOIN duplicates ON duplicates.article_id = article_info.rowid
+           WHERE article_info.rowid > ?
+           ORDER BY article_info.rowid""",
+        (since_rowid,),
+    )
+    rows = c.fetchall()
+    add_counts(
+        conn,
+        Counter(
+            value
+            for _, date, score, journal, keywords, is_duplicate in rows
+            if not is_duplicate
+            for value in article_values(date, score, journal, keywords)
+        ),
+    )
+
+    row = c.execute(
+        "SELECT last_rowid FROM ingest_state WHERE name = ?", (RESPONSES_WATERMARK,)
+    ).fetchone()
+    (until_response,) = c.execute("SELECT MAX(rowid) FROM model_responses").fetchone()
+    # Without a watermark every response so far was counted with its article
+    if row is not None and until_response is not None and until_response > row[0]:
+        # The articles above since_rowid were just counted with their score
+        c.execute(
+            """SELECT model_responses.score_num FROM model_responses
+               JOIN article_info ON article_info.doi = model_responses.doi
+               LEFT JOIN duplicates ON duplicates.article_id = article_info.rowid
+               WHERE model_responses.rowid > ? AND model_responses.rowid <= ?
+                   AND article_info.rowid <= ? AND duplicates.article_id IS NULL
+                   AND model_responses.score_num IS NOT NULL""",
+            (row[0], until_response, since_rowid),
+        )
+        add_counts(conn, Counter(("score", int(score)) for (score,) in c.fetchall()))
+    if until_response is not None:
+        c.execute(
+            "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES (?, ?)",
+            (RESPONSES_WATERMARK, until_response),
+        )
+    return rows[-1][0] if rows else None
+
+
+def rebuild(conn):
+    """
+    Recompute the rollups from every article.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    """
+    with conn:
+        conn.execute("DELETE FROM stats_rollups")
+        last_rowid = index_articles(conn, 0)
+        conn.execute(
+            "INSERT OR REPLACE INTO ingest_state (name, last_rowid) VALUES (?, ?)",
+            (STEP_NAME, last_rowid or 0),
+        )
+
+
+def read_stats(conn, top=20):
+    """
+    Read the statistics shown on the trends page from the rollups.
+
+    The cost does not depend on the number of articles: months and scores
+    have few values, and the top journals and keywords are read from the
+    index on the counts.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        An open connection to the articles database.
+    top : int, optional
+        The number of journals and keywords returned.
+
+    Returns
+    -------
+    dict
+        The number of articles per month and per score, oldest month and
+        lowest score first, and the journals and keywords with the most
+        articles.
+    """
+    c = conn.cursor()
+    stats = {}
+    for dimension in ("month", "score"):
+        c.execute(
+            """SELECT value, articles FROM stats_rollups
+               WHERE dimension = ? ORDER BY value""",
+            (dimension,),
+        )
+        stats[dimension] = [{"value": value, "articles": count} for value, count in c.fetchall()]
+    for dimension in ("journal", "keyword"):
+        c.execute(
+            """SELECT value, articles FROM stats_rollups
+               WHERE dimension = ? ORDER BY articles DESC LIMIT ?""",
+            (dimension, top),
+        )
+        stats[dimension] = [{"value": value, "articles": count} for value, count in c.fetchall()]
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute the statistics rollups.")
+    parser.add_argument("db_path", nargs="?", default=settings.db_path)
+    args = parser.parse_args()
+    conn = sqlite3.connect(args.db_path)
+    migrations.migrate(conn)
+    rebuild(conn)
+    conn.close()
@@ -0,0 +1,174 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+
+
+# Delimiters used in the free-text keyword and author columns
+KEYWORD_SPLIT = re.compile(r"[,;|\n]")
+AUTHOR_SPLIT = re.compile(r"[,;\n]|\band\b")
+
+
+def extract_terms(keywords, journal, authors):
+    """
+    Extract the suggestion terms for a single article.
+
+    Parameters
+    ----------
+    keywords : str
+        The delimited keyword text of the article.
+    journal : str
+        The journal the article was published in.
+    authors : str
+        The delimited author list of the article.
+
+    Returns
+    -------
+    set
+        A set of (field, term) tuples, with each term stripped of whitespace.
+    """
+    terms = set()
+    for keyword in KEYWORD_SPLIT.split(keywords or ""):
+        if keyword.strip():
+            terms.add(("keyword", keyword.strip()))
+    if journal and journal.strip():
+        terms.add(("journal", journal.strip()))
+    for author in AUTHOR_SPLIT.split(authors or ""):
+        if author.strip():
+            terms.add(("author", author.strip()))
+    return terms
+
+
+class TermIndex:
+    """
+    In-memory sorted term index used for prefix completion.
+
+    Terms are kept in a sorted list keyed on the lowercased term, so a prefix
+    lookup is a binary search followed by a scan of the matching range. The
+    index tracks the highest ``article_info`` rowid it has seen, so refreshing
+    only reads articles that were added since the previous refresh.
+
+    Parameters
+    ----------
+    refresh_interval : float, optional
+        The minimum number of seconds between two checks for new articles.
+    """
+
+    def __init__(self, refresh_interval=30.0):
+        self.refresh_interval = refresh_interval
+        self._keys = []  # sorted list of (lowercased term, field)
+        self._counts = {}  # (lowercased term, field) -> document count
+        self._labels = {}  # (lowercased term, field) -> display form
+        self._last_rowid = 0
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def refresh(self, conn, force=False):
+        """
+        Add articles inserted since the last refresh to the index.
+
+        Parameters
+        ----------
+        conn : sqlite3.Connection
+            An open connection to the articles database.
+        force : bool, optional
+            Refresh even if the refresh interval has not elapsed.
+
+        Returns
+        -------
+        int
+            The number of articles added to the index.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return 0
+
+        with self._lock:
+            self._last_refresh = now
+            c = conn.cursor()
+            c.execute(
+                """SELECT rowid, keywords, journal, authors FROM article_info
+                   WHERE rowid > ? ORDER BY rowid""",
+                (self._last_rowid,),
+            )
+            rows = c.fetchall()
+            new_keys = []
+            for rowid, keywords, journal, authors in rows:
+                for field, term in extract_terms(keywords, journal, authors):
+                    key = (term.lower(), field)
+                    if key in self._counts:
+                        self._counts[key] += 1
+                    else:
+                        self._counts[key] = 1
+                        self._labels[key] = term
+                        new_keys.append(key)
+                self._last_rowid = rowid
+            if new_keys:
+                # One sort instead of an insertion per term, which moves the
+                # tail of the list every time. Timsort merges the already
+                # sorted keys with the new ones in linear time.
+                self._keys = sorted(self._keys + new_keys)
+            return len(rows)
+
+    def rebuild(self, conn):
+        """
+        Discard the index and rebuild it from every article in the database.
+
+        Parameters
+        ----------
+        conn : sqlite3.Connection
+            An open connection to the articles database.
+        """
+        with self._lock:
+            self._keys = []
+            self._counts = {}
+            self._labels = {}
+            self._last_rowid = 0
+        self.refresh(conn, force=True)
+
+    def complete(self, prefix, limit=10, field=None):
+        """
+        Return the most common terms starting with a prefix.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix typed by the user. Matching is case-insensitive.
+        limit : int, optional
+            The maximum number of completions to return.
+        field : str, optional
+            Restrict completions to "keyword", "journal" or "author".
+
+        Returns
+        -------
+        list
+            A list of dictionaries containing the term, its field and the
+            number of articles it appears in, ordered by descending count.
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (prefix,))
+            matches = []
+            for key in self._keys[start:]:
+                if not key[0].startswith(prefix):
+                    break
+                if field is None or key[1] == field:
+                    matches.append(key)
+            best = heapq.nsmallest(
+                limit, matches, key=lambda key: (-self._counts[key], key)
+            )
+            return [
+                {
+                    "term": self._labels[key],
+                    "field": key[1],
+                    "count": self._counts[key],
+                }
+                for key in best
+            ]